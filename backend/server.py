@@ -1,27 +1,51 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Response
 from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from urllib.parse import quote_from_bytes, unquote_to_bytes
+from collections import Counter, OrderedDict
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import Dict, List, Optional, Union
 import uuid
 from datetime import datetime, timezone, timedelta
 import qrcode
+import qrcode.image.svg
 import io
+import codecs
 import base64
+import binascii
 import secrets
 import string
 import random
 import json
 import hashlib
-from PIL import Image, ImageFilter, ImageDraw, ImageEnhance
+import time
+from PIL import Image, ImageFilter, ImageDraw, ImageEnhance, ImageFont, ImageOps, UnidentifiedImageError
 import barcode
-from barcode.writer import ImageWriter
+from barcode.writer import ImageWriter, SVGWriter
 import re
+import ast
+import math
+import numpy as np
+import csv
+import heapq
+import itertools
+import tempfile
+import shutil
+import zipfile
+import tarfile
+import mmap
+from array import array
 
 # Optional AI integration
 try:
@@ -53,6 +77,44 @@ try:
 except Exception as e:
     logger.error(f"Could not connect to MongoDB: {e}")
 
+# Worker pool configuration
+PROCESS_POOL_WORKERS = int(os.environ.get('PROCESS_POOL_WORKERS', os.cpu_count() or 1))
+THREAD_POOL_WORKERS = int(os.environ.get('THREAD_POOL_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+POOL_MAX_QUEUE = int(os.environ.get('POOL_MAX_QUEUE', 64))
+POOL_TASK_TIMEOUT = float(os.environ.get('POOL_TASK_TIMEOUT', 10))
+# Uploaded-file tools scale with file size, so they get a longer deadline
+FILE_TASK_TIMEOUT = float(os.environ.get('FILE_TASK_TIMEOUT', 600))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+# Line sort/dedupe: default and maximum in-memory budget (MB) per request;
+# runs beyond it spill to LINE_SORT_TMP_DIR (system temp dir when unset)
+LINE_SORT_MEMORY_MB = int(os.environ.get('LINE_SORT_MEMORY_MB', 64))
+LINE_SORT_MAX_MEMORY_MB = int(os.environ.get('LINE_SORT_MAX_MEMORY_MB', 512))
+LINE_SORT_TMP_DIR = os.environ.get('LINE_SORT_TMP_DIR') or None
+
+# Bulk rendering configuration
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 64))
+
+# Render cache configuration
+RENDER_CACHE_MAX_BYTES = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+RENDER_CACHE_SHARED = os.environ.get('RENDER_CACHE_SHARED', 'false').lower() == 'true'
+RENDER_CACHE_TTL = int(os.environ.get('RENDER_CACHE_TTL', 7 * 24 * 3600))
+
+# Untrusted-input tools (regex) run in worker processes that are killed on overrun
+KILLABLE_WORKERS = int(os.environ.get('KILLABLE_WORKERS', 2))
+REGEX_TIMEOUT = float(os.environ.get('REGEX_TIMEOUT', 2))
+# Whole-file regex search (uploads) gets one overall deadline
+REGEX_FILE_TIMEOUT = float(os.environ.get('REGEX_FILE_TIMEOUT', 30))
+REGEX_MAX_MATCHES = int(os.environ.get('REGEX_MAX_MATCHES', 10000))
+CALC_TIMEOUT = float(os.environ.get('CALC_TIMEOUT', 2))
+
+# Image uploads: byte cap on the request body and pixel cap checked from the
+# header before anything is decoded (also Pillow's decompression-bomb limit)
+IMAGE_MAX_UPLOAD_BYTES = int(os.environ.get('IMAGE_MAX_UPLOAD_BYTES', 32 * 1024 * 1024))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 50_000_000))
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+# Encoding large images (AVIF especially) takes longer than the default deadline
+IMAGE_TASK_TIMEOUT = float(os.environ.get('IMAGE_TASK_TIMEOUT', 30))
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -61,6 +123,503 @@ api_router = APIRouter(prefix="/api")
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
 
 
+# ============================================
+# WORKER POOLS
+# ============================================
+
+# CPU-bound renderers (PIL, qrcode, barcode, diff) run in a process pool so
+# they never block the event loop; hashlib releases the GIL on large buffers,
+# so it only needs a thread pool. Pools are created lazily on first use.
+process_pool = None
+thread_pool = None
+
+# Each pool accepts at most workers + POOL_MAX_QUEUE outstanding tasks;
+# anything beyond that is rejected with 503 instead of queueing unbounded.
+_pool_slots = {
+    "process": asyncio.Semaphore(PROCESS_POOL_WORKERS + POOL_MAX_QUEUE),
+    "thread": asyncio.Semaphore(THREAD_POOL_WORKERS + POOL_MAX_QUEUE),
+}
+
+def _get_pool(kind):
+    global process_pool, thread_pool
+    if kind == "process":
+        if process_pool is None:
+            # spawn avoids forking a process that holds MongoDB client threads
+            process_pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return process_pool
+    if thread_pool is None:
+        thread_pool = ThreadPoolExecutor(max_workers=THREAD_POOL_WORKERS, thread_name_prefix="toolbox")
+    return thread_pool
+
+def _reset_process_pool():
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown(wait=False, cancel_futures=True)
+        process_pool = None
+
+async def _run_in_pool(kind, func, args, timeout=None, wait=False):
+    slots = _pool_slots[kind]
+    if slots.locked() and not wait:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly")
+    await slots.acquire()
+    loop = asyncio.get_running_loop()
+    try:
+        future = _get_pool(kind).submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is held until the task really finishes, not just until the
+    # caller stops waiting, so timed-out tasks still count against the queue.
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(slots.release))
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout or POOL_TASK_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Operation timed out")
+    except BrokenProcessPool:
+        _reset_process_pool()
+        raise HTTPException(status_code=503, detail="Worker pool restarted, please retry")
+
+async def run_in_process(func, *args, timeout=None, wait=False):
+    return await _run_in_pool("process", func, args, timeout, wait)
+
+async def run_in_thread(func, *args, timeout=None, wait=False):
+    return await _run_in_pool("thread", func, args, timeout, wait)
+
+def _killable_worker_main(conn):
+    # Importing this module is the slow part of a spawn; announce readiness
+    # once it is done so the caller's deadline only covers the task itself
+    conn.send(None)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        func, args = message
+        try:
+            conn.send((True, func(*args)))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+class _KillableWorker:
+    # One worker process plus the dedicated thread that talks to it, so pipe
+    # writes and deadline waits never block the event loop or the shared pool
+    def __init__(self):
+        self.waiter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="killable-waiter")
+        self.process = None
+        self.conn = None
+
+    def start(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        self.kill()
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_killable_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        self.process, self.conn = process, parent_conn
+        try:
+            self.conn.recv()
+        except BaseException:
+            self.kill()
+            raise
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+            self.process = self.conn = None
+
+    def call(self, func, args, timeout):
+        try:
+            self.start()
+            self.conn.send((func, args))
+            if not self.conn.poll(timeout):
+                raise TimeoutError
+            return self.conn.recv()
+        except BaseException:
+            # Overran or died: the worker state is unknown, so replace it in the
+            # background and let the next call on this slot find it ready
+            self.kill()
+            try:
+                self.waiter.submit(self.start)
+            except RuntimeError:
+                pass
+            raise
+
+    def shutdown(self):
+        self.waiter.shutdown(wait=False, cancel_futures=True)
+        if self.process is not None:
+            self.conn.close()
+            self.process.join(timeout=1)
+            if self.process.is_alive():
+                self.process.kill()
+
+class KillableWorkerPool:
+    # ProcessPoolExecutor cannot stop a running task, so tools that evaluate
+    # untrusted input use dedicated processes that are killed at the deadline
+    # and replaced right away.
+    def __init__(self, size):
+        self._slots = asyncio.Semaphore(size)
+        self._workers = [_KillableWorker() for _ in range(size)]
+        self._free = list(self._workers)
+
+    def start(self):
+        # Spawned at startup so the first requests do not wait for imports
+        for worker in self._workers:
+            worker.waiter.submit(worker.start)
+
+    async def run(self, func, *args, timeout):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), POOL_TASK_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Server is busy, please retry shortly")
+        loop = asyncio.get_running_loop()
+        # Oldest free slot first, giving a just-replaced worker time to start
+        worker = self._free.pop(0)
+
+        def release(_):
+            self._free.append(worker)
+            self._slots.release()
+
+        try:
+            future = worker.waiter.submit(worker.call, func, args, timeout)
+        except BaseException:
+            release(None)
+            raise
+        # The slot is held until the waiter thread is done with the worker,
+        # even if the caller is cancelled first
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+        try:
+            ok, result = await asyncio.wrap_future(future)
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="Operation exceeded its time limit")
+        if not ok:
+            raise ValueError(result)
+        return result
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.shutdown()
+
+killable_pool = KillableWorkerPool(KILLABLE_WORKERS)
+
+
+# ============================================
+# RENDER CACHE
+# ============================================
+
+# Rendered images are cached by a hash of everything that affects the output.
+# Tier 1 is an in-process LRU bounded by total bytes; tier 2 (optional) is a
+# MongoDB collection shared by all workers, expired through a TTL index.
+_render_cache = OrderedDict()
+_render_cache_bytes = 0
+_render_inflight = {}
+render_cache_stats = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0}
+
+def render_cache_key(tool, data, size=None, kind=None, fmt="png"):
+    payload = json.dumps([tool, data, size, kind, fmt], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _render_cache_put(key, value):
+    global _render_cache_bytes
+    if len(value) > RENDER_CACHE_MAX_BYTES:
+        return
+    if key in _render_cache:
+        _render_cache_bytes -= len(_render_cache.pop(key))
+    _render_cache[key] = value
+    _render_cache_bytes += len(value)
+    while _render_cache_bytes > RENDER_CACHE_MAX_BYTES:
+        _, evicted = _render_cache.popitem(last=False)
+        _render_cache_bytes -= len(evicted)
+        render_cache_stats["evictions"] += 1
+
+async def _shared_cache_get(key):
+    if not RENDER_CACHE_SHARED or db is None:
+        return None
+    try:
+        doc = await asyncio.wait_for(db.render_cache.find_one({"_id": key}), 1.0)
+    except Exception as e:
+        logger.warning(f"Shared render cache lookup failed: {e}")
+        return None
+    return bytes(doc["data"]) if doc else None
+
+async def _shared_cache_put(key, value):
+    if not RENDER_CACHE_SHARED or db is None:
+        return
+    try:
+        await asyncio.wait_for(db.render_cache.replace_one(
+            {"_id": key},
+            {"_id": key, "data": value, "created_at": datetime.now(timezone.utc)},
+            upsert=True,
+        ), 1.0)
+    except Exception as e:
+        logger.warning(f"Shared render cache store failed: {e}")
+
+# Returns (bytes, cache_status); concurrent misses for a key share one render
+async def cached_render(key, render):
+    value = _render_cache.get(key)
+    if value is not None:
+        _render_cache.move_to_end(key)
+        render_cache_stats["hits"] += 1
+        return value, "HIT"
+    
+    if key in _render_inflight:
+        value = await asyncio.shield(_render_inflight[key])
+        render_cache_stats["hits"] += 1
+        return value, "HIT"
+    
+    future = asyncio.get_running_loop().create_future()
+    _render_inflight[key] = future
+    try:
+        value = await _shared_cache_get(key)
+        if value is not None:
+            status = "HIT-SHARED"
+            render_cache_stats["shared_hits"] += 1
+        else:
+            status = "MISS"
+            render_cache_stats["misses"] += 1
+            value = await render()
+            await _shared_cache_put(key, value)
+        _render_cache_put(key, value)
+        future.set_result(value)
+        return value, status
+    except BaseException as e:
+        future.set_exception(e)
+        # Waiters re-raise the error; mark it retrieved so asyncio stays quiet
+        future.exception()
+        raise
+    finally:
+        del _render_inflight[key]
+
+
+# ============================================
+# IMAGE RESPONSES
+# ============================================
+
+IMAGE_MEDIA_TYPES = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+
+# "data_uri" is the legacy JSON response and is rendered as PNG
+def image_render_format(fmt):
+    fmt = fmt.lower()
+    if fmt == "data_uri":
+        return "png"
+    if fmt not in IMAGE_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format. Use one of: data_uri, {', '.join(IMAGE_MEDIA_TYPES)}"
+        )
+    return fmt
+
+def image_response(data, fmt, response, cache_status):
+    if fmt.lower() == "data_uri":
+        response.headers["X-Cache"] = cache_status
+        img_base64 = base64.b64encode(data).decode()
+        return {"image": f"data:image/png;base64,{img_base64}"}
+    return StreamingResponse(
+        io.BytesIO(data),
+        media_type=IMAGE_MEDIA_TYPES[fmt.lower()],
+        headers={"X-Cache": cache_status},
+    )
+
+
+# ============================================
+# IMAGE UPLOADS
+# ============================================
+
+async def read_image_upload(upload: UploadFile) -> bytes:
+    data = await upload.read(IMAGE_MAX_UPLOAD_BYTES + 1)
+    if len(data) > IMAGE_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image exceeds {IMAGE_MAX_UPLOAD_BYTES} bytes")
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty upload")
+    return data
+
+def open_image(data: bytes, draft_size=None):
+    """Open an uploaded image, refusing oversized ones before decoding.
+    
+    With draft_size, JPEGs are decoded straight at the smallest DCT scale
+    (1/2 .. 1/8) that still covers it, which is most of the cost saved on
+    large photos. Runs inside worker processes.
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+        width, height = img.size
+        if width * height > IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image has {width * height} pixels; the limit is {IMAGE_MAX_PIXELS}")
+        if draft_size:
+            img.draft("RGB", draft_size)
+        img.load()
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e))
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValueError("Unsupported or corrupt image")
+    return ImageOps.exif_transpose(img)
+
+
+# ============================================
+# UPLOAD STREAMING
+# ============================================
+
+class ZipStreamSink(io.RawIOBase):
+    # Write-only file object for zipfile: entries are buffered until the
+    # response generator pops them, so archives stream instead of piling up.
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def detach_upload(upload: UploadFile):
+    # FastAPI closes uploaded files as soon as the endpoint returns, before a
+    # StreamingResponse body runs. Streaming endpoints take ownership of the
+    # spooled file instead (no copy) and must close it when they are done.
+    spool = upload.file
+    upload.file = io.BytesIO()
+    return spool
+
+def iter_upload_records(spool, filename, content_type, fields, errors=None):
+    # Yields one dict per row of a CSV (with or without header) or NDJSON upload.
+    # An invalid NDJSON line raises ValueError, or is skipped and reported as
+    # ("line N", message) when an errors list is given. Undecodable input and
+    # broken CSV always raise (UnicodeDecodeError, csv.Error).
+    name = (filename or "").lower()
+    text = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+    if name.endswith((".ndjson", ".jsonl")) or content_type == "application/x-ndjson":
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                if errors is None:
+                    raise ValueError(f"Invalid JSON on line {line_no}")
+                errors.append((f"line {line_no}", f"Invalid JSON: {e.msg}"))
+                continue
+            yield record if isinstance(record, dict) else {fields[0]: record}
+        return
+    
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [c.strip().lower() for c in header]
+    if fields[0] in columns:
+        for row in reader:
+            yield dict(zip(columns, row))
+    else:
+        yield dict(zip(fields, header))
+        for row in reader:
+            yield dict(zip(fields, row))
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+_BULK_JOBS_LIMIT = 256
+bulk_jobs = OrderedDict()
+
+def new_bulk_job():
+    job_id = str(uuid.uuid4())
+    bulk_jobs[job_id] = {"job_id": job_id, "status": "running", "total": None, "queued": 0, "done": 0, "failed": 0}
+    while len(bulk_jobs) > _BULK_JOBS_LIMIT:
+        bulk_jobs.popitem(last=False)
+    return bulk_jobs[job_id]
+
+def safe_archive_name(name, default, ext, seen):
+    name = Path(str(name or "").replace("\\", "/")).name.strip() or default
+    if not name.lower().endswith(f".{ext}"):
+        name = f"{name}.{ext}"
+    stem, candidate, n = name[:-len(ext) - 1], name, 1
+    while candidate in seen:
+        candidate = f"{stem}_{n}.{ext}"
+        n += 1
+    seen.add(candidate)
+    return candidate
+
+UPLOAD_PARSE_ERRORS = (ValueError, UnicodeDecodeError, csv.Error)
+
+async def stream_bulk_zip(batches, render_batch, render_args, job, compression=zipfile.ZIP_STORED, errors=None):
+    # Renders batches in the process pool with a bounded in-flight window and
+    # writes each finished batch into the ZIP as soon as it arrives. batches
+    # is parsed in the thread pool; if the upload turns out to be unreadable
+    # part-way, the ZIP is still completed and the reason recorded on the job
+    # and in errors.csv (shared with the caller's per-row errors).
+    sink = ZipStreamSink()
+    window = max(2, PROCESS_POOL_WORKERS * 2)
+    pending = set()
+    errors = [] if errors is None else errors
+    loop = asyncio.get_running_loop()
+    
+    async def next_batch():
+        try:
+            return await loop.run_in_executor(_get_pool("thread"), next, batches, None)
+        except UPLOAD_PARSE_ERRORS as e:
+            job["error"] = f"Upload could not be read past row {job['queued']}: {e}"
+            errors.append(("upload", job["error"]))
+            return None
+    
+    def write_done(zf, done):
+        for task in done:
+            for name, data, error in task.result():
+                if error is None:
+                    zf.writestr(name, data)
+                    job["done"] += 1
+                else:
+                    errors.append((name, error))
+                    job["failed"] += 1
+    
+    try:
+        with zipfile.ZipFile(sink, "w", compression=compression) as zf:
+            while (batch := await next_batch()) is not None:
+                job["queued"] += len(batch)
+                pending.add(asyncio.ensure_future(
+                    run_in_process(render_batch, batch, *render_args, wait=True)
+                ))
+                if len(pending) >= window:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    write_done(zf, done)
+                    yield sink.pop()
+            job["total"] = job["queued"]
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                write_done(zf, done)
+                yield sink.pop()
+            if errors:
+                report = io.StringIO()
+                csv.writer(report).writerows([("item", "error"), *errors])
+                zf.writestr("errors.csv", report.getvalue())
+        job["status"] = "failed" if job.get("error") else "done"
+        yield sink.pop()
+    except BaseException as e:
+        job["status"] = "failed"
+        job.setdefault("error", str(e) or type(e).__name__)
+        raise
+    finally:
+        for task in pending:
+            task.cancel()
+
+
 # ============================================
 # MODELS
 # ============================================
@@ -70,8 +629,19 @@ class TextConvertRequest(BaseModel):
     text: str
     case_type: str
 
+class WhitespaceRequest(BaseModel):
+    text: str
+    mode: str = "collapse"  # collapse, trim_lines, remove
+
+class FindReplaceRequest(BaseModel):
+    text: str
+    replacements: Dict[str, str]  # literal pattern -> replacement
+    ignore_case: bool = False
+    whole_words: bool = False
+
 class WordCountRequest(BaseModel):
     text: str
+    top_n: int = 10
 
 class LoremIpsumRequest(BaseModel):
     paragraphs: int = 3
@@ -90,6 +660,12 @@ class ColorConvertRequest(BaseModel):
     from_format: str
     to_format: str
 
+class ColorBatchConvertRequest(BaseModel):
+    colors: List[Union[str, List[float]]]
+    from_format: Optional[str] = None  # detected per color when omitted
+    to_format: str
+    output: str = "string"  # string, array
+
 class PaletteGenerateRequest(BaseModel):
     base_color: Optional[str] = None
     count: int = 5
@@ -98,6 +674,19 @@ class ShadesRequest(BaseModel):
     color: str
     count: int = 10
 
+class ColorScaleSpec(BaseModel):
+    name: Optional[str] = None
+    colors: List[str]  # one base color for shades/tints/ramp, two or more stops for gradient
+    mode: str = "gradient"  # gradient, shades, tints, ramp
+    steps: int = 10
+    space: str = "oklch"  # oklch, oklab, lab
+    positions: Optional[List[float]] = None  # gradient stop positions in [0, 1]
+
+class ColorScalesRequest(BaseModel):
+    scales: List[ColorScaleSpec]
+    format: str = "hex"
+    contrast: bool = False
+
 # CSS Tool Models
 class GradientRequest(BaseModel):
     colors: List[str]
@@ -114,6 +703,7 @@ class BoxShadowRequest(BaseModel):
 class QRCodeRequest(BaseModel):
     text: str
     size: int = 300
+    format: str = "data_uri"  # data_uri, png, webp, svg
 
 class PasswordRequest(BaseModel):
     length: int = 16
@@ -132,6 +722,12 @@ class UnitConvertRequest(BaseModel):
     to_unit: str
     category: str
 
+class UnitBulkConvertRequest(BaseModel):
+    values: List[float]
+    from_unit: str
+    to_unit: str
+    category: str
+
 # Generator Models
 class UsernameGenerateRequest(BaseModel):
     style: str = "random"  # random, fantasy, business
@@ -144,10 +740,21 @@ class EmailGenerateRequest(BaseModel):
 class BarcodeGenerateRequest(BaseModel):
     data: str
     barcode_type: str = "code128"
+    format: str = "data_uri"  # data_uri, png, webp, svg
+
+class BarcodeSheetRequest(BaseModel):
+    items: List[str]
+    barcode_type: str = "code128"
+    format: str = "pdf"  # pdf, png (ZIP of pages)
+    page_size: str = "a4"  # a4, letter
+    columns: int = 3
+    rows: int = 8
+    dpi: int = 300
 
 # Math Tools Models
 class CalculatorRequest(BaseModel):
     expression: str
+    variables: Dict[str, float] = {}
 
 class PercentageRequest(BaseModel):
     value: float
@@ -169,10 +776,14 @@ class RegexTestRequest(BaseModel):
     pattern: str
     text: str
     flags: str = ""
+    max_matches: int = 1000
 
 class DiffCheckRequest(BaseModel):
     text1: str
     text2: str
+    output: str = "unified"  # unified, side_by_side
+    context: int = 3
+    intraline: bool = False
 
 class HashGenerateRequest(BaseModel):
     text: str
@@ -182,6 +793,26 @@ class TimestampRequest(BaseModel):
     timestamp: Optional[int] = None
     date_string: Optional[str] = None
 
+# Image Tool Models
+class ImageOperation(BaseModel):
+    op: str  # resize, crop, rotate, flip, blur, sharpen, brightness, contrast, saturation, grayscale, watermark, format
+    width: Optional[int] = None
+    height: Optional[int] = None
+    keep_aspect: bool = True
+    left: int = 0
+    top: int = 0
+    degrees: float = 0
+    direction: str = "horizontal"
+    radius: float = 2
+    percent: int = 150
+    factor: float = 1.0
+    text: Optional[str] = None  # watermark
+    position: str = "bottom-right"  # top-left, top-right, bottom-left, bottom-right, center
+    opacity: float = 0.5
+    font_size: Optional[int] = None  # default scales with the image
+    format: Optional[str] = None
+    quality: int = 85
+
 # AI Tools Models
 class AITextRequest(BaseModel):
     text: str
@@ -192,6 +823,884 @@ class AIImageRequest(BaseModel):
     size: str = "1024x1024"
 
 
+# ============================================
+# TEXT STATISTICS
+# ============================================
+
+# Text is fed in chunks; each chunk is cut at its last whitespace so words
+# never straddle a boundary, and sentence/paragraph state is carried over.
+READING_WORDS_PER_MINUTE = 238
+TEXT_STATS_MAX_CARRY = 1024 * 1024  # a "word" longer than this is split
+TEXT_STATS_MAX_VOCABULARY = 200_000  # word counts are pruned past this (top-N stays approximate)
+
+_SENTENCE_END = re.compile(r"[.!?]+['\"\u2019\u201d)\]]*(?=\s)")
+_BLANK_LINE = re.compile(r"\n[^\S\n]*\n")
+_PARAGRAPH_START = re.compile(r"\n[^\S\n]*\n\s*(?=\S)")
+_SENTENCE_TAIL = re.compile(r"[.!?]+['\"\u2019\u201d)\]]*\Z")
+_NON_SPACE = re.compile(r"\S")
+_VOCABULARY_WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+class TextStatistics:
+    """Single-pass, constant-memory text statistics over streamed chunks."""
+    
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.words = 0
+        self.characters = 0
+        self.characters_no_spaces = 0
+        self.characters_no_whitespace = 0
+        self.newlines = 0
+        self.sentences = 0
+        self.paragraphs = 0
+        self.frequencies = Counter()
+        self._carry = ""
+        self._open_sentence = False
+        self._gap = True  # start of text counts as a paragraph break
+        self._tail_newline = False
+    
+    def feed(self, chunk: str):
+        text = self._carry + chunk
+        cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t"), text.rfind("\r"))
+        if cut < 0 and len(text) < TEXT_STATS_MAX_CARRY:
+            self._carry = text
+            return
+        if cut < 0:
+            cut = len(text) - 1
+        self._carry = text[cut + 1:]
+        self._process(text[:cut + 1])
+    
+    def finish(self):
+        if self._carry:
+            self._process(self._carry + " ")
+            self.characters -= 1  # the sentinel space
+            self._carry = ""
+        self.sentences += self._open_sentence
+        self._open_sentence = False
+        return self.result()
+    
+    def _process(self, piece):
+        self.characters += len(piece)
+        self.characters_no_spaces += len(piece) - piece.count(" ")
+        self.newlines += piece.count("\n")
+        words = piece.split()
+        self.words += len(words)
+        self.characters_no_whitespace += sum(map(len, words))
+        if not words:
+            self._gap = self._gap or bool(_BLANK_LINE.search(("\n" if self._tail_newline else "") + piece))
+            self._tail_newline = self._tail_newline or "\n" in piece
+            return
+        
+        self.sentences += len(_SENTENCE_END.findall(piece))
+        self._open_sentence = not _SENTENCE_TAIL.search(words[-1])
+        
+        first = _NON_SPACE.search(piece).start()
+        leading = ("\n" if self._tail_newline else "") + piece[:first]
+        if self._gap or _BLANK_LINE.search(leading):
+            self.paragraphs += 1
+        self.paragraphs += len(_PARAGRAPH_START.findall(piece, first))
+        tail = piece[len(piece.rstrip()):]
+        self._gap = bool(_BLANK_LINE.search(tail))
+        self._tail_newline = "\n" in tail
+        
+        if self.top_n:
+            # Raw tokens are counted at C speed; case and punctuation are
+            # folded once per distinct token in result()
+            self.frequencies.update(words)
+            if len(self.frequencies) > TEXT_STATS_MAX_VOCABULARY:
+                self.frequencies = Counter(dict(self.frequencies.most_common(TEXT_STATS_MAX_VOCABULARY // 2)))
+    
+    def top_words(self):
+        folded = Counter()
+        for token, count in self.frequencies.items():
+            for word in _VOCABULARY_WORD.findall(token.lower().replace("\u2019", "'")):
+                folded[word] += count
+        return [{"word": word, "count": count} for word, count in folded.most_common(self.top_n)]
+    
+    def result(self):
+        return {
+            "words": self.words,
+            "characters": self.characters,
+            "characters_no_spaces": self.characters_no_spaces,
+            "characters_no_whitespace": self.characters_no_whitespace,
+            "lines": self.newlines + 1,
+            "sentences": self.sentences,
+            "paragraphs": self.paragraphs,
+            "reading_time_minutes": round(self.words / READING_WORDS_PER_MINUTE, 2),
+            "top_words": self.top_words() if self.top_n else [],
+        }
+
+def _text_statistics_stream(fileobj, top_n, chunk_size):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    stats = TextStatistics(top_n)
+    while True:
+        data = fileobj.read(chunk_size)
+        if not data:
+            break
+        stats.feed(decoder.decode(data))
+    stats.feed(decoder.decode(b"", final=True))
+    return stats.finish()
+
+
+# ============================================
+# TEXT TRANSFORMS
+# ============================================
+
+# Case and whitespace transforms that give the same result whether the text
+# arrives whole or in chunks. Transforms that depend on word or sentence
+# boundaries hold back the text after the last safe cut point.
+CASE_TYPES = ("upper", "lower", "title", "sentence", "camel", "snake", "kebab")
+WHITESPACE_MODES = ("collapse", "trim_lines", "remove")
+
+class ChunkedTransform:
+    boundaries = ()  # separators after which a chunk can be cut; empty means any point
+    
+    def __init__(self):
+        self._carry = ""
+        self._gap = False  # processed text so far ended on a boundary
+        self._emitted = False
+    
+    def feed(self, chunk: str) -> str:
+        if not self.boundaries:
+            return self._process(chunk)
+        text = self._carry + chunk
+        cut = max(text.rfind(sep) + len(sep) if sep in text else 0 for sep in self.boundaries)
+        if not cut:
+            if len(text) < TEXT_STATS_MAX_CARRY:
+                self._carry = text
+                return ""
+            # No boundary in sight: cut anyway (the next piece continues the
+            # word), but not inside what may be the start of a separator
+            cut = len(text)
+            partial = max(
+                (k for sep in self.boundaries for k in range(1, len(sep)) if text.endswith(sep[:k])),
+                default=0,
+            )
+            if partial < cut:
+                cut -= partial
+        self._carry = text[cut:]
+        return self._process(text[:cut])
+    
+    def finish(self) -> str:
+        text, self._carry = self._carry, ""
+        return self._process(text) if text else ""
+    
+    def _process(self, piece: str) -> str:
+        raise NotImplementedError
+
+class _CharacterTransform(ChunkedTransform):
+    def __init__(self, func):
+        super().__init__()
+        self._process = func
+
+_WHITESPACE_BOUNDARIES = (" ", "\n", "\t", "\r", "\f", "\v")
+
+class _TitleCase(ChunkedTransform):
+    boundaries = _WHITESPACE_BOUNDARIES
+    _last = ""
+    
+    def _process(self, piece):
+        # str.title() starts a word after any uncased character; after a forced
+        # mid-word cut, prime it with a cased letter so the word continues
+        continues = self._last and self._last.lower() != self._last.upper()
+        self._last = piece[-1]
+        return ("a" + piece).title()[1:] if continues else piece.title()
+
+class _SentenceCase(ChunkedTransform):
+    # Same rule as the original endpoint: capitalize each ". "-separated segment
+    boundaries = (". ",)
+    _at_start = True
+    
+    def _process(self, piece):
+        segments = piece.split(". ")
+        first = segments[0].capitalize() if self._at_start else segments[0].lower()
+        self._at_start = piece.endswith(". ")
+        return ". ".join([first] + [segment.capitalize() for segment in segments[1:]])
+
+class _CamelCase(ChunkedTransform):
+    boundaries = _WHITESPACE_BOUNDARIES + ("-", "_")
+    
+    def _process(self, piece):
+        words = piece.replace("-", " ").replace("_", " ").split()
+        if not words:
+            self._gap = self._gap or bool(piece)
+            return ""
+        separated = self._gap or piece[0].isspace() or piece[0] in "-_"
+        head = words[0].capitalize() if self._emitted and separated else words[0].lower()
+        self._gap = piece[-1].isspace() or piece[-1] in "-_"
+        self._emitted = True
+        return head + "".join(word.capitalize() for word in words[1:])
+
+class _CollapseWhitespace(ChunkedTransform):
+    boundaries = _WHITESPACE_BOUNDARIES
+    
+    def _process(self, piece):
+        words = piece.split()
+        if not words:
+            self._gap = self._gap or bool(piece)
+            return ""
+        prefix = " " if self._emitted and (self._gap or piece[0].isspace()) else ""
+        self._gap = piece[-1].isspace()
+        self._emitted = True
+        return prefix + " ".join(words)
+
+class _TrimLines(ChunkedTransform):
+    # Strips every line, collapses runs of spaces/tabs inside it, and writes
+    # bare \n line endings
+    boundaries = _WHITESPACE_BOUNDARIES
+    
+    def _process(self, piece):
+        out = []
+        for n, line in enumerate(piece.split("\n")):
+            if n:
+                out.append("\n")
+                self._emitted = self._gap = False
+            words = line.split()
+            if not words:
+                self._gap = self._gap or bool(line)
+                continue
+            if self._emitted and (self._gap or line[0].isspace()):
+                out.append(" ")
+            out.append(" ".join(words))
+            self._gap = line[-1].isspace()
+            self._emitted = True
+        return "".join(out)
+
+def make_case_transform(case_type: str) -> Optional[ChunkedTransform]:
+    simple = {
+        "upper": str.upper,
+        "lower": str.lower,
+        "snake": lambda text: text.replace(" ", "_").replace("-", "_").lower(),
+        "kebab": lambda text: text.replace(" ", "-").replace("_", "-").lower(),
+    }
+    if case_type in simple:
+        return _CharacterTransform(simple[case_type])
+    transform = {"title": _TitleCase, "sentence": _SentenceCase, "camel": _CamelCase}.get(case_type)
+    return transform() if transform else None
+
+def make_whitespace_transform(mode: str) -> Optional[ChunkedTransform]:
+    if mode == "remove":
+        return _CharacterTransform(lambda text: "".join(text.split()))
+    transform = {"collapse": _CollapseWhitespace, "trim_lines": _TrimLines}.get(mode)
+    return transform() if transform else None
+
+def stream_transformed_upload(spool, transform, chunk_size):
+    # Sync generator (Starlette runs it in its threadpool); owns the spool
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            data = spool.read(chunk_size)
+            if not data:
+                break
+            out = transform.feed(decoder.decode(data))
+            if out:
+                yield out.encode("utf-8")
+        tail = transform.feed(decoder.decode(b"", final=True)) + transform.finish()
+        if tail:
+            yield tail.encode("utf-8")
+    finally:
+        spool.close()
+
+def _transformed_file_response(file, transform, suffix):
+    stem = Path(file.filename or "text").stem or "text"
+    return StreamingResponse(
+        stream_transformed_upload(detach_upload(file), transform, UPLOAD_CHUNK_SIZE),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{stem}-{suffix}.txt"'},
+    )
+
+
+# Multi-pattern find/replace: an Aho-Corasick automaton matches every literal
+# in one pass. Overlaps resolve leftmost-longest, the same as an alternation
+# of the patterns sorted longest first.
+FIND_REPLACE_MAX_PATTERNS = 100_000
+FIND_REPLACE_MAX_PATTERN_CHARS = 4_000_000
+AUTOMATON_CACHE_MAX_STATES = 4_000_000  # cached automata are evicted past this many trie states
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+def _fold_case(text):
+    # Lowercase without changing length so match offsets map back onto the input
+    folded = text.lower()
+    if len(folded) != len(text):
+        folded = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+    return folded
+
+class PhraseAutomaton:
+    def __init__(self, replacements: Dict[str, str], ignore_case=False, whole_words=False):
+        self.ignore_case = ignore_case
+        self.whole_words = whole_words
+        self.patterns = list(replacements)
+        self.replacements = [replacements[p] for p in self.patterns]
+        goto = [{}]
+        depth = [0]
+        terminal = [-1]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in (_fold_case(pattern) if ignore_case else pattern):
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = goto[state][ch] = len(goto)
+                    goto.append({})
+                    depth.append(depth[state] + 1)
+                    terminal.append(-1)
+                state = nxt
+            if terminal[state] < 0:
+                terminal[state] = index
+        
+        # Breadth-first failure links; match_state points at the nearest state
+        # on the suffix chain (itself included) that ends a pattern
+        fail = [0] * len(goto)
+        match_state = [0] * len(goto)
+        queue = list(goto[0].values())
+        for child in queue:
+            match_state[child] = child if terminal[child] >= 0 else 0
+        for state in queue:
+            for ch, child in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                match_state[child] = child if terminal[child] >= 0 else match_state[fail[child]]
+                queue.append(child)
+        self.goto, self.fail, self.depth = goto, fail, depth
+        self.terminal, self.match_state = terminal, match_state
+        self.states = len(goto)
+        firsts = "".join(re.escape(ch) for ch in sorted(goto[0]))
+        self._first = re.compile(f"[{firsts}]") if firsts else None
+    
+    def _boundary_ok(self, text, start, end, before):
+        previous = text[start - 1] if start else before
+        if previous and _is_word_char(previous):
+            return False
+        # At the end of the buffer the match is either final or rescanned later
+        return end >= len(text) or not _is_word_char(text[end])
+    
+    def scan(self, text, final=True, before=""):
+        """Return (matches, keep): non-overlapping (start, end, index) matches
+        and the offset from which text must be rescanned when more follows."""
+        goto, fail, depth = self.goto, self.fail, self.depth
+        terminal, match_state, whole_words = self.terminal, self.match_state, self.whole_words
+        haystack = _fold_case(text) if self.ignore_case else text
+        matches = []
+        n = len(text)
+        state, position, pending = 0, 0, None
+        while position < n or (final and pending is not None):
+            if position >= n:
+                matches.append(pending)
+                state, position, pending = 0, pending[1], None
+                continue
+            # Idle at the root: jump straight to the next possible first character
+            found = self._first.search(haystack, position) if self._first else None
+            if found is None:
+                break
+            position = found.start()
+            for i in range(position, n):
+                ch = haystack[i]
+                while True:
+                    nxt = goto[state].get(ch)
+                    if nxt is not None:
+                        state = nxt
+                        break
+                    if not state:
+                        break
+                    state = fail[state]
+                end = i + 1
+                hit = match_state[state]
+                while hit:
+                    start = end - depth[hit]
+                    if pending is not None and start > pending[0]:
+                        break  # shorter suffixes start even later
+                    if not whole_words or self._boundary_ok(text, start, end, before):
+                        pending = (start, end, terminal[hit])
+                        break
+                    hit = match_state[fail[hit]]
+                if pending is not None and end - depth[state] > pending[0]:
+                    # Nothing can start at or before the pending match any more
+                    matches.append(pending)
+                    state, position, pending = 0, pending[1], None
+                    break
+                if not state and pending is None:
+                    position = end
+                    break
+            else:
+                position = n
+        # Rescan from the start of the current partial match; an uncommitted
+        # pending match never starts before it
+        return matches, n - depth[state]
+
+class FindReplaceStream:
+    """Chunked find/replace; holds back only text that could still match."""
+    
+    def __init__(self, automaton: PhraseAutomaton):
+        self.automaton = automaton
+        self.counts = Counter()
+        self._carry = ""
+        self._before = ""
+    
+    def _apply(self, text, matches, upto):
+        out = []
+        position = 0
+        for start, end, index in matches:
+            out.append(text[position:start])
+            out.append(self.automaton.replacements[index])
+            self.counts[index] += 1
+            position = end
+        out.append(text[position:upto])
+        return "".join(out)
+    
+    def feed(self, chunk: str) -> str:
+        text = self._carry + chunk
+        matches, keep = self.automaton.scan(text, final=False, before=self._before)
+        if keep:
+            self._before = text[keep - 1]
+        self._carry = text[keep:]
+        return self._apply(text, matches, keep)
+    
+    def finish(self) -> str:
+        text, self._carry = self._carry, ""
+        matches, _ = self.automaton.scan(text, final=True, before=self._before)
+        return self._apply(text, matches, len(text))
+    
+    def summary(self):
+        return {
+            "replacements": sum(self.counts.values()),
+            "counts": {self.automaton.patterns[i]: n for i, n in self.counts.most_common()},
+        }
+
+_automaton_cache = OrderedDict()
+_automaton_inflight = {}
+automaton_cache_stats = {"hits": 0, "misses": 0}
+
+def validate_replacements(replacements):
+    if not replacements:
+        raise HTTPException(status_code=400, detail="Provide at least one pattern")
+    if len(replacements) > FIND_REPLACE_MAX_PATTERNS:
+        raise HTTPException(status_code=400, detail=f"At most {FIND_REPLACE_MAX_PATTERNS} patterns")
+    if "" in replacements:
+        raise HTTPException(status_code=400, detail="Patterns must not be empty")
+    if sum(map(len, replacements)) > FIND_REPLACE_MAX_PATTERN_CHARS:
+        raise HTTPException(status_code=400, detail=f"Patterns exceed {FIND_REPLACE_MAX_PATTERN_CHARS} characters in total")
+
+async def get_phrase_automaton(replacements, ignore_case, whole_words):
+    """Build (in the thread pool) or reuse the automaton for a dictionary."""
+    validate_replacements(replacements)
+    payload = json.dumps([sorted(replacements.items()), ignore_case, whole_words], separators=(",", ":"))
+    key = hashlib.sha256(payload.encode()).hexdigest()
+    automaton = _automaton_cache.get(key)
+    if automaton is not None:
+        _automaton_cache.move_to_end(key)
+        automaton_cache_stats["hits"] += 1
+        return automaton, "HIT"
+    if key in _automaton_inflight:
+        return await asyncio.shield(_automaton_inflight[key]), "HIT"
+    automaton_cache_stats["misses"] += 1
+    task = asyncio.ensure_future(run_in_thread(
+        PhraseAutomaton, replacements, ignore_case, whole_words, timeout=FILE_TASK_TIMEOUT
+    ))
+    _automaton_inflight[key] = task
+    try:
+        automaton = await asyncio.shield(task)
+    finally:
+        _automaton_inflight.pop(key, None)
+    _automaton_cache[key] = automaton
+    while len(_automaton_cache) > 1 and sum(a.states for a in _automaton_cache.values()) > AUTOMATON_CACHE_MAX_STATES:
+        _automaton_cache.popitem(last=False)
+    return automaton, "MISS"
+
+def _find_replace_text(automaton, text):
+    stream = FindReplaceStream(automaton)
+    result = stream.feed(text) + stream.finish()
+    return result, stream.summary()
+
+def _load_replacements(spool):
+    # A JSON object {"pattern": "replacement"} or a two-column CSV; a CSV row
+    # with only a pattern deletes it (redaction)
+    raw = spool.read().decode("utf-8-sig")
+    if raw.lstrip().startswith("{"):
+        data = json.loads(raw)
+        if not isinstance(data, dict) or not all(isinstance(v, str) for v in data.values()):
+            raise ValueError("JSON dictionary must map strings to strings")
+        return data
+    return {row[0]: row[1] if len(row) > 1 else "" for row in csv.reader(io.StringIO(raw)) if row}
+
+# Byte codecs for uploads. Input is consumed in aligned units (3 bytes per
+# Base64 quantum, 57 per MIME line, 4 chars per decode quantum) and the
+# remainder is carried, so output is identical to encoding the whole file.
+BASE64_VARIANTS = ("standard", "urlsafe", "mime")
+_BASE64_WHITESPACE = b" \t\r\n\f\v"
+
+class ByteCodec:
+    unit = 1
+    
+    def __init__(self):
+        self._carry = b""
+    
+    def feed(self, data: bytes) -> bytes:
+        data = self._carry + data
+        cut = len(data) - len(data) % self.unit
+        self._carry = data[cut:]
+        return self._convert(data[:cut]) if cut else b""
+    
+    def finish(self) -> bytes:
+        data, self._carry = self._carry, b""
+        return self._convert(data, final=True) if data else b""
+    
+    def _convert(self, data: bytes, final: bool = False) -> bytes:
+        raise NotImplementedError
+
+class Base64Encoder(ByteCodec):
+    def __init__(self, variant):
+        super().__init__()
+        self.variant = variant
+        self.unit = 57 if variant == "mime" else 3
+    
+    def _convert(self, data, final=False):
+        if self.variant == "mime":
+            return base64.encodebytes(data).replace(b"\n", b"\r\n")
+        if self.variant == "urlsafe":
+            return base64.urlsafe_b64encode(data)
+        return base64.b64encode(data)
+
+class Base64Decoder(ByteCodec):
+    unit = 4
+    
+    def __init__(self, variant):
+        super().__init__()
+        self.variant = variant
+    
+    def feed(self, data):
+        # Line breaks (MIME) and other whitespace are not part of the quanta
+        return super().feed(data.translate(None, _BASE64_WHITESPACE))
+    
+    def _convert(self, data, final=False):
+        if final:
+            if len(data) % 4 == 1:
+                raise binascii.Error("Truncated Base64 input")
+            data += b"=" * (-len(data) % 4)  # URL-safe Base64 often drops padding
+        if self.variant == "urlsafe":
+            data = data.translate(bytes.maketrans(b"-_", b"+/"))
+        return base64.b64decode(data, validate=True)
+
+class PercentEncoder(ByteCodec):
+    def __init__(self, safe="/"):
+        super().__init__()
+        self.safe = safe
+    
+    def _convert(self, data, final=False):
+        return quote_from_bytes(data, self.safe).encode("ascii")
+
+class PercentDecoder(ByteCodec):
+    def feed(self, data):
+        # Hold back a "%" or "%X" at the end in case the escape continues
+        data = self._carry + data
+        cut = data.rfind(b"%", max(0, len(data) - 2))
+        if cut < 0:
+            cut = len(data)
+        self._carry = data[cut:]
+        return unquote_to_bytes(data[:cut]) if cut else b""
+    
+    def _convert(self, data, final=False):
+        return unquote_to_bytes(data)
+
+def iter_codec(spool, codec, chunk_size):
+    spool.seek(0)
+    while True:
+        data = spool.read(chunk_size)
+        if not data:
+            break
+        out = codec.feed(data)
+        if out:
+            yield out
+    tail = codec.finish()
+    if tail:
+        yield tail
+
+def _codec_output_size(spool, codec, chunk_size):
+    # Dry run: validates the whole input and measures the output up front, so
+    # errors become a 400 and the response can carry its exact size
+    return sum(len(out) for out in iter_codec(spool, codec, chunk_size))
+
+def _stream_codec(spool, codec, chunk_size):
+    try:
+        yield from iter_codec(spool, codec, chunk_size)
+    finally:
+        spool.close()
+
+def _upload_size(spool):
+    spool.seek(0, os.SEEK_END)
+    size = spool.tell()
+    spool.seek(0)
+    return size
+
+def base64_encoded_size(size, variant):
+    encoded = 4 * ((size + 2) // 3)
+    if variant == "mime":
+        encoded += 2 * ((size + 56) // 57)  # CRLF after every line
+    return encoded
+
+async def _codec_file_response(file, make_codec, encode, filename, media_type, known_size=None):
+    spool = detach_upload(file)
+    input_size = _upload_size(spool)
+    output_size = known_size(input_size) if known_size else None
+    if output_size is None:
+        try:
+            output_size = await run_in_thread(
+                _codec_output_size, spool, make_codec(), UPLOAD_CHUNK_SIZE, timeout=FILE_TASK_TIMEOUT
+            )
+        except Exception as e:
+            spool.close()
+            if isinstance(e, ValueError):
+                raise HTTPException(status_code=400, detail=f"Invalid input: {e}")
+            raise
+    decoded_size, encoded_size = (input_size, output_size) if encode else (output_size, input_size)
+    return StreamingResponse(
+        _stream_codec(spool, make_codec(), UPLOAD_CHUNK_SIZE),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(output_size),
+            "X-Decoded-Size": str(decoded_size),
+            "X-Encoded-Size": str(encoded_size),
+        },
+    )
+
+def _codec_filenames(file, encode, suffix):
+    name = Path(file.filename or "data").name or "data"
+    if encode:
+        return f"{name}.{suffix}"
+    return name[:-len(suffix) - 1] if name.endswith(f".{suffix}") and len(name) > len(suffix) + 1 else f"{name}.bin"
+
+
+# ============================================
+# LINE SORTING
+# ============================================
+
+# External merge sort for line uploads larger than RAM: lines are collected
+# up to the memory budget, sorted and spilled to a temporary file as a run,
+# and the output is a k-way merge of the runs. "unique" and "count" fold
+# duplicates while collecting, so repetitive input spills far less.
+LINE_SORT_MODES = ("sort", "unique", "count")
+LINE_SORT_FAN_IN = 64  # runs merged at once; more runs take extra merge passes
+LINE_OVERHEAD_BYTES = 64  # rough per-line cost (object header, list/dict slot)
+
+def _line_key(ignore_case):
+    if not ignore_case:
+        return None
+    return lambda line: line.decode("utf-8", "replace").casefold()
+
+def iter_upload_lines(spool, chunk_size, trim=False):
+    # Yields batches of lines without their terminators (\n or \r\n)
+    carry = b""
+    first = True
+    while True:
+        data = spool.read(chunk_size)
+        if not data:
+            break
+        if first:
+            data = data.removeprefix(codecs.BOM_UTF8)
+            first = False
+        lines = (carry + data).split(b"\n")
+        carry = lines.pop()
+        yield _normalize_lines(lines, trim)
+    if carry:
+        yield _normalize_lines([carry], trim)
+
+def _normalize_lines(lines, trim):
+    if trim:
+        return [line for line in map(bytes.strip, lines) if line]
+    return [line[:-1] if line.endswith(b"\r") else line for line in lines]
+
+class ExternalLineSorter:
+    """Sort, dedupe or count lines in a bounded amount of memory.
+    
+    Iterating yields (line, count) in sorted order; count is always 1 in
+    "sort" mode. For duplicates the first line seen is kept, so with
+    ignore_case the output keeps the original casing of that line.
+    """
+    
+    def __init__(self, mode="sort", memory_budget=64 * 1024 * 1024, ignore_case=False,
+                 reverse=False, tmp_dir=None):
+        self.mode = mode
+        self.memory_budget = memory_budget
+        self.key = _line_key(ignore_case)
+        self.reverse = reverse
+        self.tmp_dir = tmp_dir
+        self.lines = 0
+        self._runs = []
+        self._reset()
+    
+    def _reset(self):
+        self._buffer = []  # sort mode
+        self._counts = {}  # unique/count modes: key -> count
+        self._first = {}  # key -> first line seen, when keys differ from lines
+        self._used = 0
+    
+    def add(self, lines):
+        self.lines += len(lines)
+        if self.mode == "sort":
+            self._buffer.extend(lines)
+            self._used += sum(map(len, lines)) + LINE_OVERHEAD_BYTES * len(lines)
+        else:
+            counts, first = self._counts, self._first
+            keys = lines if self.key is None else map(self.key, lines)
+            for key, line in zip(keys, lines):
+                if key in counts:
+                    counts[key] += 1
+                else:
+                    counts[key] = 1
+                    if self.key is not None:
+                        first[key] = line
+                    self._used += len(line) + 2 * LINE_OVERHEAD_BYTES
+        if self._used >= self.memory_budget:
+            self._runs.append(self._spill(self._sorted_buffer()))
+            self._reset()
+    
+    def _sorted_buffer(self):
+        if self.mode == "sort":
+            self._buffer.sort(key=self.key, reverse=self.reverse)
+            return ((line, 1) for line in self._buffer)
+        if self.key is None:
+            return ((line, self._counts[line]) for line in sorted(self._counts, reverse=self.reverse))
+        order = sorted(self._counts, reverse=self.reverse)
+        return ((self._first[key], self._counts[key]) for key in order)
+    
+    def _spill(self, records):
+        run = tempfile.TemporaryFile(dir=self.tmp_dir)
+        if self.mode == "count":
+            run.writelines(b"%d\t%s\n" % (count, line) for line, count in records)
+        else:
+            run.writelines(line + b"\n" for line, _ in records)
+        run.seek(0)
+        return run
+    
+    def _read_run(self, run):
+        if self.mode == "count":
+            for record in run:
+                count, _, line = record[:-1].partition(b"\t")
+                yield line, int(count)
+        else:
+            for record in run:
+                yield record[:-1], 1
+    
+    def _merge(self, sources):
+        key = self.key or (lambda line: line)
+        merged = heapq.merge(*sources, key=lambda record: key(record[0]), reverse=self.reverse)
+        if self.mode == "sort":
+            yield from merged
+            return
+        # Sources are in input order and heapq.merge is stable, so the first
+        # record of each group is the earliest line seen
+        current = current_key = None
+        total = 0
+        for line, count in merged:
+            k = key(line)
+            if current is not None and k == current_key:
+                total += count
+                continue
+            if current is not None:
+                yield current, total
+            current, current_key, total = line, k, count
+        if current is not None:
+            yield current, total
+    
+    def __iter__(self):
+        # Bound open files: collapse the oldest runs until one pass will do
+        while len(self._runs) >= LINE_SORT_FAN_IN:
+            batch = self._runs[:LINE_SORT_FAN_IN]
+            merged = self._spill(self._merge([self._read_run(run) for run in batch]))
+            for run in batch:
+                run.close()
+            self._runs[:LINE_SORT_FAN_IN] = [merged]
+        sources = [self._read_run(run) for run in self._runs]
+        sources.append(self._sorted_buffer())
+        return self._merge(sources)
+    
+    def close(self):
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._reset()
+
+def stream_sorted_lines(spool, sorter, trim, chunk_size):
+    # Sync generator (Starlette runs it in its threadpool); owns the spool.
+    # Nothing can be sent until the whole upload has been read and split
+    # into runs; the merge then streams out.
+    try:
+        for lines in iter_upload_lines(spool, chunk_size, trim):
+            sorter.add(lines)
+        spool.close()
+        out = []
+        size = 0
+        count_mode = sorter.mode == "count"
+        for line, count in sorter:
+            record = b"%d\t%s\n" % (count, line) if count_mode else line + b"\n"
+            out.append(record)
+            size += len(record)
+            if size >= chunk_size:
+                yield b"".join(out)
+                out = []
+                size = 0
+        if out:
+            yield b"".join(out)
+    finally:
+        spool.close()
+        sorter.close()
+
+
+class HyperLogLog:
+    """Approximate distinct counter with 2 ** precision one-byte registers;
+    the standard error is about 1.04 / sqrt(2 ** precision)."""
+    
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = np.zeros(self.size, dtype=np.uint8)
+    
+    @property
+    def standard_error(self):
+        return 1.04 / math.sqrt(self.size)
+    
+    def add_hashes(self, hashes):
+        # hashes: uint64 array. The top bits pick the register; the rank is
+        # the position of the first set bit in the next 32 bits (capped at 33,
+        # which only matters beyond ~10^13 distinct values)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        rest = ((hashes << p) >> np.uint64(32)).astype(np.float64)  # exact below 2**53
+        _, bit_length = np.frexp(rest)
+        np.maximum.at(self.registers, index, (33 - bit_length).astype(np.uint8))
+    
+    def add(self, items):
+        # Python's hash() is 64-bit SipHash for bytes/str, seeded per process,
+        # so a sketch is only meaningful within the process that filled it
+        hashes = np.fromiter(map(hash, items), dtype=np.int64, count=len(items))
+        self.add_hashes(hashes.view(np.uint64))
+    
+    def estimate(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+def estimate_distinct_lines(fileobj, precision, ignore_case, trim, chunk_size):
+    sketch = HyperLogLog(precision)
+    key = _line_key(ignore_case)
+    lines = 0
+    for batch in iter_upload_lines(fileobj, chunk_size, trim):
+        lines += len(batch)
+        sketch.add(batch if key is None else list(map(key, batch)))
+    return {
+        "lines": lines,
+        "approx_distinct": round(min(sketch.estimate(), lines)),
+        "standard_error": round(sketch.standard_error, 4),
+        "precision": precision,
+    }
+
+
 # ============================================
 # ROUTES - TEXT TOOLS
 # ============================================
@@ -202,43 +1711,73 @@ async def root():
 
 @api_router.post("/tools/text/convert")
 async def convert_text_case(req: TextConvertRequest):
-    text = req.text
-    case_type = req.case_type
-    
-    if case_type == "upper":
-        result = text.upper()
-    elif case_type == "lower":
-        result = text.lower()
-    elif case_type == "title":
-        result = text.title()
-    elif case_type == "sentence":
-        result = ". ".join(s.capitalize() for s in text.split(". "))
-    elif case_type == "camel":
-        words = text.replace("-", " ").replace("_", " ").split()
-        result = words[0].lower() + "".join(w.capitalize() for w in words[1:])
-    elif case_type == "snake":
-        result = text.replace(" ", "_").replace("-", "_").lower()
-    elif case_type == "kebab":
-        result = text.replace(" ", "-").replace("_", "-").lower()
-    else:
-        result = text
-    
-    return {"result": result}
+    transform = make_case_transform(req.case_type)
+    if transform is None:
+        return {"result": req.text}
+    return {"result": transform.feed(req.text) + transform.finish()}
+
+@api_router.post("/tools/text/convert/file")
+async def convert_text_case_file(file: UploadFile = File(...), case_type: str = Form(...)):
+    transform = make_case_transform(case_type)
+    if transform is None:
+        raise HTTPException(status_code=400, detail=f"case_type must be one of: {', '.join(CASE_TYPES)}")
+    return _transformed_file_response(file, transform, case_type)
 
 @api_router.post("/tools/text/wordcount")
 async def count_words(req: WordCountRequest):
-    text = req.text
-    words = len(text.split())
-    chars = len(text)
-    chars_no_spaces = len(text.replace(" ", ""))
-    lines = len(text.split("\n"))
-    
-    return {
-        "words": words,
-        "characters": chars,
-        "characters_no_spaces": chars_no_spaces,
-        "lines": lines
-    }
+    stats = TextStatistics(max(0, min(req.top_n, 1000)))
+    stats.feed(req.text)
+    return stats.finish()
+
+@api_router.post("/tools/text/wordcount/file")
+async def count_words_file(file: UploadFile = File(...), top_n: int = Form(10)):
+    # UTF-8 is decoded incrementally, so memory stays flat for any file size
+    return await run_in_thread(
+        _text_statistics_stream, file.file, max(0, min(top_n, 1000)), UPLOAD_CHUNK_SIZE,
+        timeout=FILE_TASK_TIMEOUT,
+    )
+
+@api_router.post("/tools/text/sort-lines/file")
+async def sort_lines_file(
+    file: UploadFile = File(...),
+    mode: str = Form("sort"),
+    ignore_case: bool = Form(False),
+    reverse: bool = Form(False),
+    trim: bool = Form(False),
+    memory_mb: int = Form(LINE_SORT_MEMORY_MB),
+):
+    # sort keeps duplicates, unique drops them, count emits "<count>\t<line>".
+    # Lines are compared as UTF-8 bytes (code point order) unless ignore_case.
+    if mode not in LINE_SORT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(LINE_SORT_MODES)}")
+    sorter = ExternalLineSorter(
+        mode,
+        memory_budget=max(1, min(memory_mb, LINE_SORT_MAX_MEMORY_MB)) * 1024 * 1024,
+        ignore_case=ignore_case,
+        reverse=reverse,
+        tmp_dir=LINE_SORT_TMP_DIR,
+    )
+    stem = Path(file.filename or "lines").stem or "lines"
+    return StreamingResponse(
+        stream_sorted_lines(detach_upload(file), sorter, trim, UPLOAD_CHUNK_SIZE),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{stem}-{mode}.txt"'},
+    )
+
+@api_router.post("/tools/text/distinct-lines/file")
+async def distinct_lines_file(
+    file: UploadFile = File(...),
+    ignore_case: bool = Form(False),
+    trim: bool = Form(False),
+    precision: int = Form(14),
+):
+    # One pass with a HyperLogLog sketch: a quick preview before a full sort
+    if not 4 <= precision <= 18:
+        raise HTTPException(status_code=400, detail="precision must be between 4 and 18")
+    return await run_in_thread(
+        estimate_distinct_lines, file.file, precision, ignore_case, trim, UPLOAD_CHUNK_SIZE,
+        timeout=FILE_TASK_TIMEOUT,
+    )
 
 @api_router.post("/tools/text/lorem")
 async def generate_lorem(req: LoremIpsumRequest):
@@ -247,10 +1786,42 @@ async def generate_lorem(req: LoremIpsumRequest):
     return {"result": "\n\n".join(paragraphs)}
 
 @api_router.post("/tools/text/whitespace")
-async def remove_whitespace(req: TextConvertRequest):
-    text = req.text
-    result = " ".join(text.split())
-    return {"result": result}
+async def remove_whitespace(req: WhitespaceRequest):
+    transform = make_whitespace_transform(req.mode)
+    if transform is None:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(WHITESPACE_MODES)}")
+    return {"result": transform.feed(req.text) + transform.finish()}
+
+@api_router.post("/tools/text/whitespace/file")
+async def remove_whitespace_file(file: UploadFile = File(...), mode: str = Form("collapse")):
+    transform = make_whitespace_transform(mode)
+    if transform is None:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(WHITESPACE_MODES)}")
+    return _transformed_file_response(file, transform, mode)
+
+@api_router.post("/tools/text/replace")
+async def find_replace(req: FindReplaceRequest, response: Response):
+    automaton, cache_status = await get_phrase_automaton(req.replacements, req.ignore_case, req.whole_words)
+    result, summary = await run_in_thread(_find_replace_text, automaton, req.text, timeout=FILE_TASK_TIMEOUT)
+    response.headers["X-Cache"] = cache_status
+    return {"result": result, **summary}
+
+@api_router.post("/tools/text/replace/file")
+async def find_replace_file(
+    file: UploadFile = File(...),
+    dictionary: UploadFile = File(...),
+    ignore_case: bool = Form(False),
+    whole_words: bool = Form(False),
+):
+    # dictionary is a JSON object or two-column CSV (pattern, replacement)
+    try:
+        replacements = await run_in_thread(_load_replacements, dictionary.file)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid dictionary: {e}")
+    automaton, cache_status = await get_phrase_automaton(replacements, ignore_case, whole_words)
+    response = _transformed_file_response(file, FindReplaceStream(automaton), "replaced")
+    response.headers["X-Cache"] = cache_status
+    return response
 
 @api_router.post("/tools/text/base64")
 async def base64_convert(req: Base64Request):
@@ -258,11 +1829,35 @@ async def base64_convert(req: Base64Request):
         result = base64.b64encode(req.text.encode()).decode()
     else:
         try:
-            result = base64.b64decode(req.text).decode()
-        except:
+            result = base64.b64decode("".join(req.text.split()), validate=True).decode()
+        except binascii.Error:
             raise HTTPException(status_code=400, detail="Invalid Base64 string")
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=400,
+                detail="Decoded data is not UTF-8 text; use /tools/text/base64/file for binary data",
+            )
     return {"result": result}
 
+@api_router.post("/tools/text/base64/file")
+async def base64_convert_file(
+    file: UploadFile = File(...),
+    encode: bool = Form(True),
+    variant: str = Form("standard"),
+):
+    # Streams any (binary) file; sizes are in X-Decoded-Size / X-Encoded-Size
+    if variant not in BASE64_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"variant must be one of: {', '.join(BASE64_VARIANTS)}")
+    if encode:
+        return await _codec_file_response(
+            file, lambda: Base64Encoder(variant), True, _codec_filenames(file, True, "b64"),
+            "text/plain; charset=ascii", known_size=lambda size: base64_encoded_size(size, variant),
+        )
+    return await _codec_file_response(
+        file, lambda: Base64Decoder(variant), False, _codec_filenames(file, False, "b64"),
+        "application/octet-stream",
+    )
+
 @api_router.post("/tools/text/url-encode")
 async def url_encode(req: URLEncodeRequest):
     from urllib.parse import quote, unquote
@@ -272,6 +1867,406 @@ async def url_encode(req: URLEncodeRequest):
         result = unquote(req.text)
     return {"result": result}
 
+@api_router.post("/tools/text/url-encode/file")
+async def url_encode_file(file: UploadFile = File(...), encode: bool = Form(True), safe: str = Form("/")):
+    if encode:
+        return await _codec_file_response(
+            file, lambda: PercentEncoder(safe), True, _codec_filenames(file, True, "url"),
+            "text/plain; charset=ascii",
+        )
+    return await _codec_file_response(
+        file, PercentDecoder, False, _codec_filenames(file, False, "url"), "application/octet-stream",
+    )
+
+
+# ============================================
+# COLOR ENGINE
+# ============================================
+
+# Colors are held as float arrays of shape (n, channels) plus an alpha vector.
+# Every space converts to and from gamma-encoded sRGB in [0, 1] (unclipped, so
+# LAB/OKLab round trips keep out-of-gamut values); each conversion is a handful
+# of whole-array operations, never a per-color loop.
+
+COLOR_FORMATS = ("hex", "rgb", "rgba", "hsl", "hsv", "lab", "oklab", "oklch", "cmyk")
+COLOR_BATCH_MAX = 100_000
+
+# Per space: (scale for bare numbers, scale for percentages) per channel, giving
+# the internal units: rgb/cmyk 0-1, hue in degrees, s/l/v 0-1, LAB L 0-100,
+# OKLab/OKLCH L 0-1. Percent chroma follows CSS Color 4 (100% = 125 / 0.4).
+_COLOR_CHANNEL_SCALES = {
+    "rgb": ((1 / 255,) * 3, (1, 1, 1)),
+    "hsl": ((1, 0.01, 0.01), (3.6, 1, 1)),
+    "hsv": ((1, 0.01, 0.01), (3.6, 1, 1)),
+    "lab": ((1, 1, 1), (100, 125, 125)),
+    "oklab": ((1, 1, 1), (1, 0.4, 0.4)),
+    "oklch": ((1, 1, 1), (1, 0.4, 3.6)),
+    "cmyk": ((0.01,) * 4, (1,) * 4),
+}
+_COLOR_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?(%?)", re.IGNORECASE)
+_HEX_COLOR = re.compile(r"#?([0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})")
+
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+_RGB_TO_LMS = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005],
+])
+_LMS_TO_OKLAB = np.array([
+    [0.2104542553, 0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, 0.4505937099],
+    [0.0259040371, 0.7827717662, -0.8086757660],
+])
+_OKLAB_TO_LMS = np.linalg.inv(_LMS_TO_OKLAB)
+_LMS_TO_RGB = np.linalg.inv(_RGB_TO_LMS)
+
+def srgb_to_linear(rgb):
+    magnitude = np.abs(rgb)
+    return np.sign(rgb) * np.where(magnitude <= 0.04045, magnitude / 12.92, ((magnitude + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(linear):
+    magnitude = np.abs(linear)
+    return np.sign(linear) * np.where(
+        magnitude <= 0.0031308, magnitude * 12.92, 1.055 * magnitude ** (1 / 2.4) - 0.055
+    )
+
+def _hue(rgb, cmax, delta):
+    r, g, b = rgb.T
+    d = np.where(delta == 0, 1, delta)
+    hue = np.select(
+        [delta == 0, cmax == r, cmax == g],
+        [0, ((g - b) / d) % 6, (b - r) / d + 2],
+        (r - g) / d + 4,
+    )
+    return hue * 60
+
+def _rgb_to_hsl(rgb):
+    rgb = np.clip(rgb, 0, 1)
+    cmax, cmin = rgb.max(axis=1), rgb.min(axis=1)
+    delta = cmax - cmin
+    lightness = (cmax + cmin) / 2
+    denominator = 1 - np.abs(2 * lightness - 1)
+    saturation = np.divide(delta, denominator, out=np.zeros_like(delta), where=denominator > 0)
+    return np.column_stack([_hue(rgb, cmax, delta), saturation, lightness])
+
+def _hsl_to_rgb(hsl):
+    h, s, l = hsl.T
+    a = (s * np.minimum(l, 1 - l))[:, None]
+    k = (np.array([0, 8, 4]) + (h % 360)[:, None] / 30) % 12
+    return l[:, None] - a * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+
+def _rgb_to_hsv(rgb):
+    rgb = np.clip(rgb, 0, 1)
+    cmax, cmin = rgb.max(axis=1), rgb.min(axis=1)
+    delta = cmax - cmin
+    saturation = np.divide(delta, cmax, out=np.zeros_like(delta), where=cmax > 0)
+    return np.column_stack([_hue(rgb, cmax, delta), saturation, cmax])
+
+def _hsv_to_rgb(hsv):
+    h, s, v = hsv.T
+    k = (np.array([5, 3, 1]) + (h % 360)[:, None] / 60) % 6
+    return v[:, None] - (v * s)[:, None] * np.clip(np.minimum(k, 4 - k), 0, 1)
+
+def _rgb_to_lab(rgb):
+    xyz = srgb_to_linear(rgb) @ _RGB_TO_XYZ.T / _D65_WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    fx, fy, fz = f.T
+    return np.column_stack([116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)])
+
+def _lab_to_rgb(lab):
+    L, a, b = lab.T
+    fy = (L + 16) / 116
+    f = np.column_stack([fy + a / 500, fy, fy - b / 200])
+    xyz = np.where(f > 6 / 29, f ** 3, 3 * (6 / 29) ** 2 * (f - 4 / 29)) * _D65_WHITE
+    return linear_to_srgb(xyz @ _XYZ_TO_RGB.T)
+
+def _rgb_to_oklab(rgb):
+    return np.cbrt(srgb_to_linear(rgb) @ _RGB_TO_LMS.T) @ _LMS_TO_OKLAB.T
+
+def _oklab_to_rgb(oklab):
+    return linear_to_srgb((oklab @ _OKLAB_TO_LMS.T) ** 3 @ _LMS_TO_RGB.T)
+
+def oklab_to_oklch(oklab):
+    L, a, b = oklab.T
+    return np.column_stack([L, np.hypot(a, b), np.degrees(np.arctan2(b, a)) % 360])
+
+def oklch_to_oklab(oklch):
+    L, C, h = oklch.T
+    radians = np.radians(h)
+    return np.column_stack([L, C * np.cos(radians), C * np.sin(radians)])
+
+def _rgb_to_cmyk(rgb):
+    rgb = np.clip(rgb, 0, 1)
+    k = 1 - rgb.max(axis=1)
+    scale = 1 - k
+    cmy = np.divide(1 - rgb - k[:, None], scale[:, None], out=np.zeros_like(rgb), where=scale[:, None] > 0)
+    return np.column_stack([cmy, k])
+
+def _cmyk_to_rgb(cmyk):
+    return (1 - cmyk[:, :3]) * (1 - cmyk[:, 3:4])
+
+_TO_RGB = {
+    "rgb": lambda rgb: rgb,
+    "hsl": _hsl_to_rgb,
+    "hsv": _hsv_to_rgb,
+    "lab": _lab_to_rgb,
+    "oklab": _oklab_to_rgb,
+    "oklch": lambda oklch: _oklab_to_rgb(oklch_to_oklab(oklch)),
+    "cmyk": _cmyk_to_rgb,
+}
+_FROM_RGB = {
+    "rgb": lambda rgb: rgb,
+    "hsl": _rgb_to_hsl,
+    "hsv": _rgb_to_hsv,
+    "lab": _rgb_to_lab,
+    "oklab": _rgb_to_oklab,
+    "oklch": lambda rgb: oklab_to_oklch(_rgb_to_oklab(rgb)),
+    "cmyk": _rgb_to_cmyk,
+}
+# Pairs that have a shorter path than going through sRGB
+_DIRECT_COLOR_PATHS = {
+    ("oklab", "oklch"): oklab_to_oklch,
+    ("oklch", "oklab"): oklch_to_oklab,
+}
+
+def color_space(fmt: str) -> str:
+    fmt = (fmt or "").strip().lower()
+    if fmt not in COLOR_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported color format '{fmt}'. Supported: {', '.join(COLOR_FORMATS)}",
+        )
+    return "rgb" if fmt in ("hex", "rgba") else fmt
+
+def convert_color_array(values, from_space: str, to_space: str):
+    if from_space == to_space:
+        return values
+    direct = _DIRECT_COLOR_PATHS.get((from_space, to_space))
+    if direct is not None:
+        return direct(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _FROM_RGB[to_space](_TO_RGB[from_space](values))
+
+def detect_color_format(color: str) -> str:
+    text = color.strip().lower()
+    if text.startswith("#") or _HEX_COLOR.fullmatch(text):
+        return "hex"
+    name = text.split("(", 1)[0].strip()
+    if name in ("rgb", "rgba", "hsl", "hsla", "hsv", "hsva", "lab", "oklab", "oklch", "cmyk"):
+        return name.rstrip("a") if name in ("hsla", "hsva") else name
+    raise ValueError("could not detect color format")
+
+def _parse_hex(colors):
+    digits = []
+    for color in colors:
+        match = _HEX_COLOR.fullmatch(color.strip())
+        if not match:
+            raise ValueError(f"invalid hex color '{color}'")
+        value = match.group(1)
+        if len(value) <= 4:
+            value = "".join(ch * 2 for ch in value)
+        digits.append(value if len(value) == 8 else value + "ff")
+    rgba = np.frombuffer(bytes.fromhex("".join(digits)), dtype=np.uint8).reshape(-1, 4) / 255
+    return rgba[:, :3], rgba[:, 3]
+
+def _parse_channels(color, space):
+    # Strings like "hsl(210 40% 50% / 0.5)" or lists like [210, 40, 50]
+    channels = len(_COLOR_CHANNEL_SCALES[space][0])
+    if isinstance(color, str):
+        tokens = [(float(m.group(0).rstrip("%")), bool(m.group(1))) for m in _COLOR_NUMBER.finditer(color)]
+    else:
+        tokens = [(float(v), False) for v in color]
+    if len(tokens) not in (channels, channels + 1):
+        raise ValueError(f"expected {channels} channels for {space}, got {len(tokens)}")
+    number_scale, percent_scale = _COLOR_CHANNEL_SCALES[space]
+    values = [
+        value / 100 * percent_scale[i] if percent else value * number_scale[i]
+        for i, (value, percent) in enumerate(tokens[:channels])
+    ]
+    alpha = 1.0
+    if len(tokens) > channels:
+        value, percent = tokens[channels]
+        alpha = value / 100 if percent else value
+    return values, min(max(alpha, 0.0), 1.0)
+
+def parse_colors(colors, from_format: Optional[str] = None):
+    """Parse colors into {space: (indices, values, alpha)} plus per-index errors.
+    
+    Without from_format each string's format is detected from its prefix, so
+    mixed inputs are grouped and every group is still parsed in one go.
+    """
+    # Same normalization as color_space(), so "HEX" is treated as hex
+    from_format = from_format.strip().lower() if from_format else None
+    errors = {}
+    groups = {}
+    for i, color in enumerate(colors):
+        try:
+            if from_format:
+                fmt = from_format
+            elif isinstance(color, str):
+                fmt = detect_color_format(color)
+            else:
+                raise ValueError("from_format is required for channel lists")
+            if fmt == "hex" and not isinstance(color, str):
+                raise ValueError("hex colors must be strings")
+            groups.setdefault(fmt, []).append(i)
+        except ValueError as e:
+            errors[i] = str(e)
+    
+    parsed = {}
+    for fmt, indices in groups.items():
+        space = color_space(fmt)
+        if fmt == "hex":
+            try:
+                values, alpha = _parse_hex([colors[i] for i in indices])
+            except ValueError:
+                # Fall back to one at a time to report which entries are bad
+                good, rows, alphas = [], [], []
+                for i in indices:
+                    try:
+                        value, a = _parse_hex([colors[i]])
+                        good.append(i)
+                        rows.append(value[0])
+                        alphas.append(a[0])
+                    except ValueError as e:
+                        errors[i] = str(e)
+                indices = good
+                values, alpha = np.array(rows).reshape(-1, 3), np.array(alphas)
+        else:
+            good, rows, alphas = [], [], []
+            for i in indices:
+                try:
+                    value, a = _parse_channels(colors[i], space)
+                    good.append(i)
+                    rows.append(value)
+                    alphas.append(a)
+                except (ValueError, TypeError) as e:
+                    errors[i] = str(e)
+            indices = good
+            values = np.array(rows, dtype=float).reshape(-1, len(_COLOR_CHANNEL_SCALES[space][0]))
+            alpha = np.array(alphas, dtype=float)
+        if len(indices):
+            previous = parsed.get(space)
+            if previous is not None:
+                indices = previous[0] + indices
+                values = np.vstack([previous[1], values])
+                alpha = np.concatenate([previous[2], alpha])
+            parsed[space] = (indices, values, alpha)
+    return parsed, errors
+
+def _trim(value, digits):
+    text = f"{value:.{digits}f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+def format_colors(values, alpha, fmt: str) -> List[str]:
+    fmt = fmt.lower()
+    if fmt in ("hex", "rgb", "rgba"):
+        rgb8 = np.rint(np.clip(values, 0, 1) * 255).astype(np.uint8)
+        if fmt == "hex":
+            alpha8 = np.rint(np.clip(alpha, 0, 1) * 255).astype(np.uint8)
+            packed = np.column_stack([rgb8, alpha8]).tobytes().hex()
+            return [
+                "#" + packed[i * 8:i * 8 + (6 if a == 255 else 8)]
+                for i, a in enumerate(alpha8.tolist())
+            ]
+        rows = rgb8.tolist()
+        return [
+            f"rgb({r}, {g}, {b})" if fmt == "rgb" and a >= 1 else f"rgba({r}, {g}, {b}, {_trim(a, 3)})"
+            for (r, g, b), a in zip(rows, alpha.tolist())
+        ]
+    
+    if fmt in ("hsl", "hsv"):
+        rows = np.rint(values * [1, 100, 100]).astype(int)
+        rows[:, 0] %= 360
+        return [
+            f"{fmt}({h}, {s}%, {v}%)" if a >= 1 else f"{fmt}a({h}, {s}%, {v}%, {_trim(a, 3)})"
+            for (h, s, v), a in zip(rows.tolist(), alpha.tolist())
+        ]
+    suffix = [f" / {_trim(a, 3)})" if a < 1 else ")" for a in alpha.tolist()]
+    if fmt == "cmyk":
+        rows = np.rint(values * 100).astype(int).tolist()
+        return [f"cmyk({c}%, {m}%, {y}%, {k}%)" for c, m, y, k in rows]
+    if fmt == "lab":
+        return [f"lab({_trim(L, 2)}% {_trim(a, 2)} {_trim(b, 2)}{end}"
+                for (L, a, b), end in zip(values.tolist(), suffix)]
+    return [f"{fmt}({_trim(x, 4)} {_trim(y, 4)} {_trim(z, 4 if fmt == 'oklab' else 2)}{end}"
+            for (x, y, z), end in zip(values.tolist(), suffix)]
+
+def convert_colors(colors, from_format: Optional[str], to_format: str, output: str = "string"):
+    to_space = color_space(to_format)
+    if from_format:
+        color_space(from_format)
+    parsed, errors = parse_colors(colors, from_format)
+    results = [None] * len(colors)
+    for space, (indices, values, alpha) in parsed.items():
+        converted = convert_color_array(values, space, to_space)
+        if output == "array":
+            if to_space in ("rgb", "hsl", "hsv", "cmyk"):
+                converted = np.clip(converted, 0, None if to_space != "rgb" else 1)
+            rows = np.round(np.column_stack([converted, alpha]), 6).tolist()
+        else:
+            rows = format_colors(converted, alpha, to_format)
+        for i, row in zip(indices, rows):
+            results[i] = row
+    return results, errors
+
+
+# Scales are built by interpolating between stops in a perceptual space.
+COLOR_SCALE_SPACES = ("oklch", "oklab", "lab")
+COLOR_SCALE_MODES = ("gradient", "shades", "tints", "ramp")
+
+def gamut_map_oklch(oklch, iterations=16):
+    """Pull out-of-gamut OKLCH colors into sRGB by lowering chroma only."""
+    def in_gamut(lch):
+        rgb = _TO_RGB["oklch"](lch)
+        return np.all((rgb >= -1e-6) & (rgb <= 1 + 1e-6), axis=1)
+    
+    outside = ~in_gamut(oklch)
+    if not outside.any():
+        return oklch
+    lch = oklch[outside].copy()
+    low, high = np.zeros(len(lch)), lch[:, 1].copy()
+    for _ in range(iterations):
+        lch[:, 1] = (low + high) / 2
+        fits = in_gamut(lch)
+        low = np.where(fits, lch[:, 1], low)
+        high = np.where(fits, high, lch[:, 1])
+    lch[:, 1] = low
+    mapped = oklch.copy()
+    mapped[outside] = lch
+    return mapped
+
+def interpolate_colors(start, end, t, space: str):
+    """Blend sRGB rows start -> end at fractions t, interpolating in space."""
+    a = convert_color_array(start, "rgb", space)
+    b = convert_color_array(end, "rgb", space)
+    t = t[:, None]
+    if space != "oklch":
+        return _TO_RGB[space](a + (b - a) * t)
+    # Achromatic stops have no meaningful hue; borrow the other stop's
+    achromatic_a, achromatic_b = a[:, 1] < 1e-4, b[:, 1] < 1e-4
+    a[achromatic_a, 2] = b[achromatic_a, 2]
+    b[achromatic_b, 2] = a[achromatic_b, 2]
+    mixed = a + (b - a) * t
+    hue_delta = (b[:, 2] - a[:, 2] + 180) % 360 - 180
+    mixed[:, 2] = (a[:, 2] + hue_delta * t[:, 0]) % 360
+    return _TO_RGB["oklch"](gamut_map_oklch(mixed))
+
+def relative_luminance(rgb):
+    return srgb_to_linear(np.clip(rgb, 0, 1)) @ np.array([0.2126, 0.7152, 0.0722])
+
+def contrast_ratios(luminance_a, luminance_b):
+    """WCAG 2 contrast ratio for every (a, b) pair as a matrix."""
+    high = np.maximum(luminance_a[:, None], luminance_b[None, :])
+    low = np.minimum(luminance_a[:, None], luminance_b[None, :])
+    return (high + 0.05) / (low + 0.05)
+
 
 # ============================================
 # ROUTES - COLOR TOOLS
@@ -279,52 +2274,25 @@ async def url_encode(req: URLEncodeRequest):
 
 @api_router.post("/tools/color/convert")
 async def convert_color(req: ColorConvertRequest):
-    def hex_to_rgb(hex_color):
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
-    def rgb_to_hex(r, g, b):
-        return f"#{r:02x}{g:02x}{b:02x}"
-    
-    color = req.color
-    from_format = req.from_format
-    to_format = req.to_format
-    
-    if from_format == "hex":
-        r, g, b = hex_to_rgb(color)
-    elif from_format in ["rgb", "rgba"]:
-        parts = color.replace("rgb(", "").replace("rgba(", "").replace(")", "").split(",")
-        r, g, b = int(parts[0]), int(parts[1]), int(parts[2])
-    
-    if to_format == "hex":
-        result = rgb_to_hex(r, g, b)
-    elif to_format == "rgb":
-        result = f"rgb({r}, {g}, {b})"
-    elif to_format == "rgba":
-        result = f"rgba({r}, {g}, {b}, 1)"
-    elif to_format == "hsl":
-        r_norm, g_norm, b_norm = r/255, g/255, b/255
-        cmax = max(r_norm, g_norm, b_norm)
-        cmin = min(r_norm, g_norm, b_norm)
-        delta = cmax - cmin
-        
-        l = (cmax + cmin) / 2
-        s = 0 if delta == 0 else delta / (1 - abs(2*l - 1))
-        
-        if delta == 0:
-            h = 0
-        elif cmax == r_norm:
-            h = 60 * (((g_norm - b_norm) / delta) % 6)
-        elif cmax == g_norm:
-            h = 60 * (((b_norm - r_norm) / delta) + 2)
-        else:
-            h = 60 * (((r_norm - g_norm) / delta) + 4)
-        
-        result = f"hsl({int(h)}, {int(s*100)}%, {int(l*100)}%)"
-    else:
-        result = color
-    
-    return {"result": result}
+    results, errors = convert_colors([req.color], req.from_format, req.to_format)
+    if errors:
+        raise HTTPException(status_code=400, detail=f"Invalid color: {errors[0]}")
+    return {"result": results[0]}
+
+@api_router.post("/tools/color/convert/batch")
+async def convert_color_batch(req: ColorBatchConvertRequest):
+    # Entries that fail to parse come back as null with an entry in "errors"
+    if len(req.colors) > COLOR_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {COLOR_BATCH_MAX} colors per request")
+    if req.output not in ("string", "array"):
+        raise HTTPException(status_code=400, detail="output must be 'string' or 'array'")
+    results, errors = await run_in_thread(
+        convert_colors, req.colors, req.from_format, req.to_format, req.output
+    )
+    return {
+        "results": results,
+        "errors": [{"index": i, "error": errors[i]} for i in sorted(errors)],
+    }
 
 @api_router.post("/tools/color/palette")
 async def generate_palette(req: PaletteGenerateRequest):
@@ -360,6 +2328,116 @@ async def generate_shades(req: ShadesRequest):
     return {"shades": shades}
 
 
+COLOR_SCALES_MAX = 1000
+COLOR_SCALE_MAX_STEPS = 100
+
+def _scale_samples(spec, base_lightness):
+    """Stop positions and sample positions for one scale spec."""
+    steps = np.arange(spec.steps)
+    if spec.mode == "gradient":
+        if len(spec.colors) < 2:
+            raise ValueError("gradient scales need at least two colors")
+        if spec.positions is None:
+            positions = np.linspace(0, 1, len(spec.colors))
+        else:
+            positions = np.asarray(spec.positions, dtype=float)
+            if len(positions) != len(spec.colors) or np.any(np.diff(positions) < 0) \
+                    or positions.min() < 0 or positions.max() > 1:
+                raise ValueError("positions must be ascending values in [0, 1], one per color")
+        return positions, np.linspace(0, 1, spec.steps)
+    if len(spec.colors) != 1:
+        raise ValueError(f"{spec.mode} scales take exactly one base color")
+    if spec.mode in ("shades", "tints"):
+        # Starts at the base color and stops one step short of black/white
+        return np.array([0.0, 1.0]), steps / spec.steps
+    # ramp: light to dark through the base, placed by its own lightness
+    return (
+        np.array([0.0, float(np.clip(1 - base_lightness, 0.05, 0.95)), 1.0]),
+        (steps + 1) / (spec.steps + 1),
+    )
+
+def build_color_scales(specs, fmt: str, contrast: bool):
+    flat = [color for spec in specs for color in spec.colors]
+    parsed, errors = parse_colors(flat)
+    if errors:
+        index = min(errors)
+        raise ValueError(f"color '{flat[index]}': {errors[index]}")
+    stops = np.empty((len(flat), 3))
+    stop_alpha = np.empty(len(flat))
+    for space, (indices, values, alpha) in parsed.items():
+        stops[indices] = convert_color_array(values, space, "rgb")
+        stop_alpha[indices] = alpha
+    lightness = _rgb_to_oklab(stops)[:, 0]
+    white, black = np.ones((1, 3)), np.zeros((1, 3))
+    
+    groups = {}  # space -> lists of (start, end, t, alpha start, alpha end, output slots)
+    total = 0
+    first = 0
+    for n, spec in enumerate(specs):
+        count = len(spec.colors)
+        if not count:
+            raise ValueError(f"scale {n}: colors must not be empty")
+        if spec.mode not in COLOR_SCALE_MODES:
+            raise ValueError(f"scale {n}: mode must be one of {', '.join(COLOR_SCALE_MODES)}")
+        if spec.space not in COLOR_SCALE_SPACES:
+            raise ValueError(f"scale {n}: space must be one of {', '.join(COLOR_SCALE_SPACES)}")
+        if not 2 <= spec.steps <= COLOR_SCALE_MAX_STEPS:
+            raise ValueError(f"scale {n}: steps must be between 2 and {COLOR_SCALE_MAX_STEPS}")
+        try:
+            positions, t = _scale_samples(spec, lightness[first])
+        except ValueError as e:
+            raise ValueError(f"scale {n}: {e}")
+        rgb, alpha = stops[first:first + count], stop_alpha[first:first + count]
+        if spec.mode == "shades":
+            rgb, alpha = np.vstack([rgb, black]), np.append(alpha, alpha)
+        elif spec.mode == "tints":
+            rgb, alpha = np.vstack([rgb, white]), np.append(alpha, alpha)
+        elif spec.mode == "ramp":
+            rgb, alpha = np.vstack([white, rgb, black]), np.concatenate([alpha, alpha, alpha])
+        first += count
+        
+        segment = np.clip(np.searchsorted(positions, t, side="right") - 1, 0, len(positions) - 2)
+        width = positions[segment + 1] - positions[segment]
+        local = np.divide(t - positions[segment], width, out=np.zeros_like(t), where=width > 0)
+        group = groups.setdefault(spec.space, [])
+        group.append((rgb[segment], rgb[segment + 1], local, alpha[segment], alpha[segment + 1],
+                      np.arange(total, total + spec.steps)))
+        total += spec.steps
+    
+    out_rgb = np.empty((total, 3))
+    out_alpha = np.empty(total)
+    for space, parts in groups.items():
+        start, end, t, alpha_start, alpha_end, slots = (np.concatenate(column) for column in zip(*parts))
+        out_rgb[slots] = interpolate_colors(start, end, t, space)
+        out_alpha[slots] = alpha_start + (alpha_end - alpha_start) * t
+    
+    formatted = format_colors(convert_color_array(out_rgb, "rgb", color_space(fmt)), out_alpha, fmt)
+    luminance = relative_luminance(out_rgb) if contrast else None
+    scales = []
+    offset = 0
+    for spec in specs:
+        scale = {"name": spec.name, "mode": spec.mode, "colors": formatted[offset:offset + spec.steps]}
+        if contrast:
+            lum = luminance[offset:offset + spec.steps]
+            scale["contrast"] = np.round(contrast_ratios(lum, lum), 2).tolist()
+            scale["contrast_white"] = np.round(contrast_ratios(lum, np.ones(1))[:, 0], 2).tolist()
+            scale["contrast_black"] = np.round(contrast_ratios(lum, np.zeros(1))[:, 0], 2).tolist()
+        scales.append(scale)
+        offset += spec.steps
+    return scales
+
+@api_router.post("/tools/color/scales")
+async def generate_color_scales(req: ColorScalesRequest):
+    if not req.scales or len(req.scales) > COLOR_SCALES_MAX:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {COLOR_SCALES_MAX} scales")
+    color_space(req.format)
+    try:
+        scales = await run_in_thread(build_color_scales, req.scales, req.format, req.contrast)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"scales": scales}
+
+
 # ============================================
 # ROUTES - CSS TOOLS
 # ============================================
@@ -390,180 +2468,1364 @@ async def generate_glassmorphism(blur: int = 10, opacity: float = 0.3):
 # ROUTES - MISC TOOLS
 # ============================================
 
-@api_router.post("/tools/misc/qrcode")
-async def generate_qr_code(req: QRCodeRequest):
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(req.text)
-    qr.make(fit=True)
+QR_MIN_SIZE, QR_MAX_SIZE = 64, 4096
+
+def _render_qr(text, fmt="png", size=300):
+    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    qr.add_data(text)
+    qr.make(fit=True)
+    # Whole pixels per module keep raster codes sharp, so the image is the
+    # largest multiple of the module count that fits in size (SVG scales freely)
+    qr.box_size = max(1, size // (qr.modules_count + 2 * qr.border))
+    
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        # Vector output: the module grid is written as a single SVG path
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    elif fmt == "webp":
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.get_image().convert("L").save(buffer, format="WEBP", lossless=True)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@api_router.post("/tools/misc/qrcode")
+async def generate_qr_code(req: QRCodeRequest, response: Response):
+    fmt = image_render_format(req.format)
+    size = min(max(req.size, QR_MIN_SIZE), QR_MAX_SIZE)
+    # SVG output does not depend on size, so all sizes share one cache entry
+    key = render_cache_key("qrcode", req.text, None if fmt == "svg" else size, fmt=fmt)
+    data, cache_status = await cached_render(
+        key, lambda: run_in_process(_render_qr, req.text, fmt, size)
+    )
+    return image_response(data, req.format, response, cache_status)
+
+def _render_qr_batch(items, fmt):
+    results = []
+    for name, text in items:
+        try:
+            results.append((name, _render_qr(text, fmt), None))
+        except Exception as e:
+            results.append((name, None, str(e)))
+    return results
+
+@api_router.post("/tools/misc/qrcode/bulk")
+async def generate_qr_codes_bulk(file: UploadFile = File(...), format: str = Form("png")):
+    fmt = format.lower()
+    if fmt not in IMAGE_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(IMAGE_MEDIA_TYPES)}")
+    
+    spool = detach_upload(file)
+    errors = []
+    
+    def items():
+        seen = set()
+        records = iter_upload_records(spool, file.filename, file.content_type, ("text", "filename"), errors)
+        try:
+            for n, record in enumerate(records, 1):
+                text = record.get("text")
+                if not text:
+                    continue
+                yield safe_archive_name(record.get("filename"), f"qr_{n:06d}", fmt, seen), str(text)
+        finally:
+            spool.close()
+    
+    # The first batch is parsed before any bytes are sent, so an unreadable
+    # upload is a 400 rather than an empty 200 ZIP
+    batches = batched(items(), BULK_BATCH_SIZE)
+    try:
+        first = await run_in_thread(next, batches, None, timeout=FILE_TASK_TIMEOUT)
+    except UPLOAD_PARSE_ERRORS as e:
+        spool.close()
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {e}")
+    except BaseException:
+        spool.close()
+        raise
+    if first is None:
+        detail = f"Invalid upload: {errors[0][0]}: {errors[0][1]}" if errors else "Upload has no rows with text"
+        raise HTTPException(status_code=400, detail=detail)
+    
+    job = new_bulk_job()
+    compression = zipfile.ZIP_DEFLATED if fmt == "svg" else zipfile.ZIP_STORED
+    return StreamingResponse(
+        stream_bulk_zip(
+            itertools.chain([first], batches), _render_qr_batch, (fmt,), job, compression, errors
+        ),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="qrcodes.zip"',
+            "X-Job-Id": job["job_id"],
+        },
+    )
+
+@api_router.get("/tools/bulk/{job_id}")
+async def get_bulk_job(job_id: str):
+    job = bulk_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@api_router.post("/tools/misc/password")
+async def generate_password(req: PasswordRequest):
+    chars = ""
+    if req.include_uppercase:
+        chars += string.ascii_uppercase
+    if req.include_lowercase:
+        chars += string.ascii_lowercase
+    if req.include_numbers:
+        chars += string.digits
+    if req.include_symbols:
+        chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
+    
+    if not chars:
+        raise HTTPException(status_code=400, detail="Must include at least one character type")
+    
+    password = "".join(secrets.choice(chars) for _ in range(req.length))
+    return {"password": password}
+
+@api_router.post("/tools/misc/shuffle")
+async def shuffle_list(req: ShuffleRequest):
+    items = req.items.copy()
+    random.shuffle(items)
+    return {"shuffled": items}
+
+@api_router.get("/tools/misc/uuid")
+async def generate_uuid():
+    return {"uuid": str(uuid.uuid4())}
+
+@api_router.get("/tools/cache/stats")
+async def get_render_cache_stats():
+    return {
+        **render_cache_stats,
+        "entries": len(_render_cache),
+        "bytes": _render_cache_bytes,
+        "max_bytes": RENDER_CACHE_MAX_BYTES,
+        "shared": RENDER_CACHE_SHARED,
+    }
+
+
+# ============================================
+# ROUTES - CODE TOOLS
+# ============================================
+
+@api_router.post("/tools/code/json-format")
+async def format_json(data: dict):
+    try:
+        formatted = json.dumps(data.get("json_str"), indent=2)
+        return {"result": formatted}
+    except:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+
+
+# ============================================
+# ROUTES - UNIT CONVERTERS
+# ============================================
+
+# Each unit is (scale, offset) onto the category's base unit: base = value * scale + offset.
+# Only temperature needs offsets; everything else is a plain factor.
+UNIT_DEFINITIONS = {
+    "length": {
+        "meter": 1, "kilometer": 1000, "centimeter": 0.01, "millimeter": 0.001,
+        "micrometer": 1e-6, "nanometer": 1e-9,
+        "mile": 1609.344, "yard": 0.9144, "foot": 0.3048, "inch": 0.0254,
+        "nautical_mile": 1852,
+    },
+    "weight": {
+        "kilogram": 1, "gram": 0.001, "milligram": 1e-6, "tonne": 1000,
+        "pound": 0.45359237, "ounce": 0.028349523125, "stone": 6.35029318,
+    },
+    "temperature": {
+        "celsius": (1, 273.15),
+        "fahrenheit": (5 / 9, 273.15 - 32 * 5 / 9),
+        "kelvin": (1, 0),
+        "rankine": (5 / 9, 0),
+    },
+    "data": {
+        "bit": 0.125, "byte": 1,
+        "kilobyte": 1e3, "megabyte": 1e6, "gigabyte": 1e9, "terabyte": 1e12, "petabyte": 1e15,
+        "kibibyte": 2 ** 10, "mebibyte": 2 ** 20, "gibibyte": 2 ** 30, "tebibyte": 2 ** 40,
+    },
+    "area": {
+        "square_meter": 1, "square_kilometer": 1e6, "square_centimeter": 1e-4, "square_millimeter": 1e-6,
+        "hectare": 1e4, "acre": 4046.8564224,
+        "square_mile": 2589988.110336, "square_yard": 0.83612736, "square_foot": 0.09290304, "square_inch": 0.00064516,
+    },
+    "volume": {
+        "liter": 1, "milliliter": 0.001, "cubic_meter": 1000, "cubic_centimeter": 0.001,
+        "gallon": 3.785411784, "quart": 0.946352946, "pint": 0.473176473, "cup": 0.2365882365,
+        "fluid_ounce": 0.0295735295625, "tablespoon": 0.01478676478125, "teaspoon": 0.00492892159375,
+        "imperial_gallon": 4.54609, "cubic_foot": 28.316846592, "cubic_inch": 0.016387064,
+    },
+    "speed": {
+        "meter_per_second": 1, "kilometer_per_hour": 1 / 3.6, "mile_per_hour": 0.44704,
+        "foot_per_second": 0.3048, "knot": 1852 / 3600,
+    },
+    "time": {
+        "nanosecond": 1e-9, "microsecond": 1e-6, "millisecond": 0.001, "second": 1,
+        "minute": 60, "hour": 3600, "day": 86400, "week": 604800,
+        "month": 2629746, "year": 31556952,
+    },
+    "pressure": {
+        "pascal": 1, "kilopascal": 1000, "megapascal": 1e6, "bar": 1e5, "millibar": 100,
+        "atmosphere": 101325, "psi": 6894.757293168, "torr": 101325 / 760, "mmhg": 133.322387415,
+    },
+    "energy": {
+        "joule": 1, "kilojoule": 1000, "megajoule": 1e6, "calorie": 4.184, "kilocalorie": 4184,
+        "watt_hour": 3600, "kilowatt_hour": 3.6e6, "electronvolt": 1.602176634e-19, "btu": 1055.05585262,
+    },
+}
+
+class UnitCategory:
+    """Units of one category with every pairwise conversion precomputed."""
+    
+    def __init__(self, name, definitions):
+        self.name = name
+        self.units = tuple(definitions)
+        self.index = {unit: i for i, unit in enumerate(self.units)}
+        pairs = [d if isinstance(d, tuple) else (d, 0) for d in definitions.values()]
+        scale = np.array([p[0] for p in pairs], dtype=float)
+        offset = np.array([p[1] for p in pairs], dtype=float)
+        # to_j = from_i * (scale_i / scale_j) + (offset_i - offset_j) / scale_j
+        self.factors = scale[:, None] / scale[None, :]
+        self.offsets = (offset[:, None] - offset[None, :]) / scale[None, :]
+    
+    def lookup(self, unit: str) -> int:
+        try:
+            return self.index[unit.strip().lower()]
+        except KeyError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown {self.name} unit '{unit}'. Supported: {', '.join(self.units)}",
+            )
+    
+    def converter(self, from_unit: str, to_unit: str):
+        i, j = self.lookup(from_unit), self.lookup(to_unit)
+        return float(self.factors[i, j]), float(self.offsets[i, j])
+
+UNIT_REGISTRY = {name: UnitCategory(name, units) for name, units in UNIT_DEFINITIONS.items()}
+# Results are rounded to significant digits, not decimals: 1 nm is 1e-9 m
+UNIT_SIGNIFICANT_DIGITS = 12
+
+def round_significant(values, digits=UNIT_SIGNIFICANT_DIGITS):
+    if not np.ndim(values):
+        return float(round_significant(np.array([values], dtype=float), digits)[0])
+    v = np.array(values, dtype=float)
+    nonzero = np.isfinite(v) & (v != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = digits - 1 - np.floor(np.log10(np.abs(v)))
+    # Powers of ten up to 1e22 are exact doubles, so scaling by one rounds once;
+    # the rare magnitudes outside that range fall back to exact formatting
+    exact = nonzero & (np.abs(k) <= 22)
+    scale = 10.0 ** np.abs(k[exact])
+    x = v[exact]
+    v[exact] = np.where(k[exact] >= 0, np.round(x * scale) / scale, np.round(x / scale) * scale)
+    for i in np.flatnonzero(nonzero & ~exact):
+        v[i] = float(f"{v[i]:.{digits}g}")
+    return v
+
+def get_unit_converter(category: str, from_unit: str, to_unit: str):
+    registry = UNIT_REGISTRY.get(category.strip().lower())
+    if registry is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown category '{category}'. Supported: {', '.join(UNIT_REGISTRY)}",
+        )
+    return registry.converter(from_unit, to_unit)
+
+@api_router.get("/tools/convert/units")
+async def list_units():
+    return {"categories": {name: list(c.units) for name, c in UNIT_REGISTRY.items()}}
+
+@api_router.post("/tools/convert/units")
+async def convert_units(req: UnitConvertRequest):
+    factor, offset = get_unit_converter(req.category, req.from_unit, req.to_unit)
+    return {"result": round_significant(req.value * factor + offset)}
+
+@api_router.post("/tools/convert/units/bulk")
+async def convert_units_bulk(req: UnitBulkConvertRequest):
+    factor, offset = get_unit_converter(req.category, req.from_unit, req.to_unit)
+    values = np.asarray(req.values, dtype=float)
+    results = await run_in_thread(round_significant, values * factor + offset)
+    return {"results": results.tolist()}
+
+@api_router.post("/tools/convert/units/bulk/file")
+async def convert_units_file(
+    file: UploadFile = File(...),
+    column: str = Form(...),
+    category: str = Form(...),
+    from_unit: str = Form(...),
+    to_unit: str = Form(...),
+    output_column: str = Form(""),
+):
+    # Appends the converted column to a CSV upload; blank or non-numeric cells stay blank
+    factor, offset = get_unit_converter(category, from_unit, to_unit)
+    spool = detach_upload(file)
+    reader = csv.reader(io.TextIOWrapper(spool, encoding="utf-8-sig", newline=""))
+    header = [h.strip() for h in next(reader, [])]
+    if column not in header:
+        spool.close()
+        raise HTTPException(status_code=400, detail=f"Column '{column}' not found in CSV header")
+    index = header.index(column)
+    
+    def stream():
+        out = io.StringIO()
+        writer = csv.writer(out)
+        try:
+            writer.writerow([*header, output_column or f"{column}_{to_unit.strip().lower()}"])
+            yield out.getvalue()
+            for chunk in batched(reader, CALC_BATCH_CHUNK_ROWS):
+                values = _to_float_column([row[index] if index < len(row) else "" for row in chunk])
+                converted = _format_floats(round_significant(values * factor + offset))
+                out.seek(0)
+                out.truncate()
+                writer.writerows(row + [value] for row, value in zip(chunk, converted))
+                yield out.getvalue()
+        finally:
+            spool.close()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="converted.csv"'},
+    )
+
+
+# ============================================
+# ROUTES - GENERATORS
+# ============================================
+
+@api_router.post("/tools/generate/username")
+async def generate_username(req: UsernameGenerateRequest):
+    if req.style == "random":
+        chars = string.ascii_lowercase + string.digits
+        username = "".join(random.choice(chars) for _ in range(req.length))
+    elif req.style == "fantasy":
+        prefixes = ["dark", "shadow", "fire", "ice", "storm", "blade", "moon", "star"]
+        suffixes = ["walker", "rider", "hunter", "mage", "lord", "keeper", "slayer"]
+        username = random.choice(prefixes) + random.choice(suffixes) + str(random.randint(1, 999))
+    else:  # business
+        first = ["john", "jane", "alex", "chris", "sam", "jordan", "taylor"]
+        last = ["smith", "johnson", "williams", "brown", "jones"]
+        username = random.choice(first) + "." + random.choice(last) + str(random.randint(1, 99))
+    
+    return {"username": username}
+
+@api_router.post("/tools/generate/email")
+async def generate_email(req: EmailGenerateRequest):
+    if req.name:
+        local_part = req.name.lower().replace(" ", ".")
+    else:
+        local_part = "user" + str(random.randint(1000, 9999))
+    
+    email = f"{local_part}@{req.domain}"
+    return {"email": email}
+
+# Symbology names are matched ignoring case, "-" and "_" (EAN-13, upc_a, ...)
+BARCODE_CLASSES = {
+    name.replace("-", "").replace("_", ""): barcode.get_barcode_class(name)
+    for name in barcode.PROVIDED_BARCODES
+}
+BARCODE_PAGE_SIZES_MM = {"a4": (210.0, 297.0), "letter": (215.9, 279.4)}
+BARCODE_SHEET_MARGIN_MM = 10.0
+BARCODE_SHEET_MAX_ITEMS = 5000
+
+# Writers are stateless between renders, so each worker process keeps one per format
+_barcode_writers = {}
+
+def get_barcode_class(barcode_type):
+    barcode_class = BARCODE_CLASSES.get(barcode_type.lower().replace("-", "").replace("_", ""))
+    if barcode_class is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported barcode type. Use one of: {', '.join(barcode.PROVIDED_BARCODES)}"
+        )
+    return barcode_class
+
+def _get_barcode_writer(fmt, dpi=300):
+    writer = _barcode_writers.get((fmt, dpi))
+    if writer is None:
+        if fmt == "svg":
+            writer = SVGWriter()
+        else:
+            writer = ImageWriter(format=fmt.upper(), mode="L", dpi=dpi)
+        _barcode_writers[(fmt, dpi)] = writer
+    return writer
+
+def _render_barcode(data, barcode_type="code128", fmt="png"):
+    barcode_instance = get_barcode_class(barcode_type)(data, writer=_get_barcode_writer(fmt))
+    
+    buffer = io.BytesIO()
+    barcode_instance.write(buffer)
+    return buffer.getvalue()
+
+def _render_barcode_sheet(items, barcode_type, fmt, page_size, columns, rows, dpi):
+    # Symbols are painted straight onto one page canvas that is cleared and
+    # reused for every page; only whole pages are ever encoded.
+    barcode_class = get_barcode_class(barcode_type)
+    writer = _get_barcode_writer("png", dpi)
+    
+    symbols, errors = [], []
+    for item in items:
+        try:
+            symbols.append(barcode_class(item, writer=writer))
+        except Exception as e:
+            errors.append(f"{item}: {e}")
+    if errors:
+        raise ValueError(f"{len(errors)} invalid item(s): " + "; ".join(errors[:5]))
+    
+    def px(mm):
+        return int(round(mm / 25.4 * dpi))
+    
+    page_w_mm, page_h_mm = BARCODE_PAGE_SIZES_MM[page_size]
+    cell_w_mm = (page_w_mm - 2 * BARCODE_SHEET_MARGIN_MM) / columns
+    cell_h_mm = (page_h_mm - 2 * BARCODE_SHEET_MARGIN_MM) / rows
+    cell_w, cell_h = px(cell_w_mm), px(cell_h_mm)
+    canvas = Image.new("L", (px(page_w_mm), px(page_h_mm)), 255)
+    per_page = columns * rows
+    
+    output = io.BytesIO()
+    pages = zipfile.ZipFile(output, "w") if fmt == "png" else None
+    for page_no, start in enumerate(range(0, len(symbols), per_page)):
+        canvas.paste(255, (0, 0, *canvas.size))
+        for i, symbol in enumerate(symbols[start:start + per_page]):
+            # Pick the module width that fills the cell so bars stay crisp
+            modules = len(symbol.build()[0])
+            quiet_zone = 2.0
+            options = {
+                "module_width": max(0.1, (cell_w_mm * 0.9 - 2 * quiet_zone) / modules),
+                "module_height": max(5.0, cell_h_mm * 0.5),
+                "quiet_zone": quiet_zone,
+                "font_size": 8,
+                "text_distance": 3.0,
+            }
+            img = symbol.render(options)
+            if img.width > cell_w or img.height > cell_h:
+                img.thumbnail((cell_w, cell_h))
+            col, row = i % columns, i // columns
+            x = px(BARCODE_SHEET_MARGIN_MM) + col * cell_w + (cell_w - img.width) // 2
+            y = px(BARCODE_SHEET_MARGIN_MM) + row * cell_h + (cell_h - img.height) // 2
+            canvas.paste(img, (x, y))
+        # Bilevel pages keep PDFs small and bars sharp on label printers
+        bilevel = canvas.convert("1", dither=Image.Dither.NONE)
+        if pages is not None:
+            page = io.BytesIO()
+            bilevel.save(page, format="PNG", dpi=(dpi, dpi))
+            pages.writestr(f"page_{page_no + 1:03d}.png", page.getvalue())
+        else:
+            bilevel.save(output, format="PDF", resolution=dpi, append=page_no > 0)
+    if pages is not None:
+        pages.close()
+    return output.getvalue()
+
+@api_router.post("/tools/generate/barcode")
+async def generate_barcode_image(req: BarcodeGenerateRequest, response: Response):
+    fmt = image_render_format(req.format)
+    # Keyed on the resolved symbology, so "EAN-13" and "ean13" share an entry
+    barcode_class = get_barcode_class(req.barcode_type)
+    key = render_cache_key("barcode", req.data, kind=barcode_class.__name__, fmt=fmt)
+    try:
+        data, cache_status = await cached_render(
+            key, lambda: run_in_process(_render_barcode, req.data, req.barcode_type, fmt)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return image_response(data, req.format, response, cache_status)
+
+@api_router.post("/tools/generate/barcode/sheet")
+async def generate_barcode_sheet(req: BarcodeSheetRequest):
+    fmt = req.format.lower()
+    page_size = req.page_size.lower()
+    if fmt not in ("pdf", "png"):
+        raise HTTPException(status_code=400, detail="Unsupported format. Use pdf or png")
+    if page_size not in BARCODE_PAGE_SIZES_MM:
+        raise HTTPException(status_code=400, detail=f"Unsupported page size. Use one of: {', '.join(BARCODE_PAGE_SIZES_MM)}")
+    if not req.items or len(req.items) > BARCODE_SHEET_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {BARCODE_SHEET_MAX_ITEMS} items")
+    if not (1 <= req.columns <= 20 and 1 <= req.rows <= 40 and 72 <= req.dpi <= 600):
+        raise HTTPException(status_code=400, detail="columns must be 1-20, rows 1-40 and dpi 72-600")
+    get_barcode_class(req.barcode_type)
+    
+    try:
+        data = await run_in_process(
+            _render_barcode_sheet, req.items, req.barcode_type, fmt, page_size,
+            req.columns, req.rows, req.dpi, timeout=POOL_TASK_TIMEOUT * 6,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if fmt == "pdf":
+        media_type, filename = "application/pdf", "barcodes.pdf"
+    else:
+        media_type, filename = "application/zip", "barcodes.zip"
+    return StreamingResponse(
+        io.BytesIO(data),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ============================================
+# ROUTES - IMAGE TOOLS
+# ============================================
+
+PALETTE_SAMPLE_SIZE = 200  # longest side the image is reduced to before clustering
+PALETTE_METHODS = ("kmeans", "median_cut")
+
+def _kmeans(points, k, iterations=24, seed=0):
+    """Vectorized k-means with k-means++ seeding; returns (centers, counts)."""
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(len(points))]]
+    nearest = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = nearest.sum()
+        if total == 0:
+            break
+        pick = points[rng.choice(len(points), p=nearest / total)]
+        centers.append(pick)
+        nearest = np.minimum(nearest, ((points - pick) ** 2).sum(axis=1))
+    centers = np.array(centers)
+    
+    squared = (points ** 2).sum(axis=1)[:, None]
+    for _ in range(iterations):
+        distances = squared - 2 * points @ centers.T + (centers ** 2).sum(axis=1)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=len(centers))
+        sums = np.column_stack([
+            np.bincount(labels, weights=points[:, c], minlength=len(centers)) for c in range(points.shape[1])
+        ])
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(updated, centers, atol=1e-5):
+            break
+        centers = updated
+    return centers, counts
+
+def _extract_palette(data, count, method):
+    img = open_image(data, (PALETTE_SAMPLE_SIZE * 2, PALETTE_SAMPLE_SIZE * 2))
+    img.thumbnail((PALETTE_SAMPLE_SIZE, PALETTE_SAMPLE_SIZE), Image.Resampling.BOX)
+    rgba = np.asarray(img.convert("RGBA")).reshape(-1, 4)
+    # Ignore (mostly) transparent pixels so backgrounds don't dominate
+    rgb = rgba[rgba[:, 3] >= 128, :3]
+    if not len(rgb):
+        raise ValueError("Image has no opaque pixels")
+    
+    if method == "median_cut":
+        quantized = Image.fromarray(rgb.reshape(1, -1, 3)).quantize(count, method=Image.Quantize.MEDIANCUT)
+        flat = quantized.getpalette()
+        found = sorted(quantized.getcolors(count), reverse=True)
+        colors = np.array([flat[index * 3:index * 3 + 3] for _, index in found], dtype=float) / 255
+        weights = np.array([n for n, _ in found], dtype=float)
+    else:
+        # Cluster in OKLab so distances track perceived difference
+        centers, counts = _kmeans(_rgb_to_oklab(rgb / 255), min(count, len(rgb)))
+        order = np.argsort(-counts)
+        order = order[counts[order] > 0]
+        colors = np.clip(_oklab_to_rgb(centers[order]), 0, 1)
+        weights = counts[order].astype(float)
+    
+    weights /= weights.sum()
+    hexes = format_colors(colors, np.ones(len(colors)), "hex")
+    rgb8 = np.rint(colors * 255).astype(int).tolist()
+    return [
+        {"hex": hex_color, "rgb": rgb_row, "weight": round(float(weight), 4)}
+        for hex_color, rgb_row, weight in zip(hexes, rgb8, weights)
+    ]
+
+@api_router.post("/tools/image/palette")
+async def extract_image_palette(
+    file: UploadFile = File(...),
+    colors: int = Form(5),
+    method: str = Form("kmeans"),
+):
+    if not 1 <= colors <= 32:
+        raise HTTPException(status_code=400, detail="colors must be between 1 and 32")
+    if method not in PALETTE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(PALETTE_METHODS)}")
+    data = await read_image_upload(file)
+    try:
+        palette = await run_in_process(_extract_palette, data, colors, method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"palette": palette}
+
+
+# Output format -> (Pillow format, media type, file extension)
+IMAGE_OUTPUT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "png": ("PNG", "image/png", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "avif": ("AVIF", "image/avif", "avif"),
+}
+IMAGE_MAX_DIMENSION = 8192
+IMAGE_PIPELINE_MAX_OPS = 20
+
+def _check_dimensions(width, height):
+    if width < 1 or height < 1 or width > IMAGE_MAX_DIMENSION or height > IMAGE_MAX_DIMENSION:
+        raise ValueError(f"Dimensions must be between 1 and {IMAGE_MAX_DIMENSION} pixels")
+    return width, height
+
+def _target_size(img, width, height, keep_aspect):
+    if not width and not height:
+        raise ValueError("resize needs width and/or height")
+    if keep_aspect or not (width and height):
+        scale = min(width / img.width if width else math.inf, height / img.height if height else math.inf)
+        return _check_dimensions(max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return _check_dimensions(width, height)
+
+def _apply_image_op(img, op):
+    name = op["op"]
+    if name == "resize":
+        size = _target_size(img, op["width"], op["height"], op["keep_aspect"])
+        return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if name == "crop":
+        width, height = op["width"] or img.width - op["left"], op["height"] or img.height - op["top"]
+        box = (op["left"], op["top"], op["left"] + width, op["top"] + height)
+        if op["left"] < 0 or op["top"] < 0 or width < 1 or height < 1 or box[2] > img.width or box[3] > img.height:
+            raise ValueError(f"Crop box {box} is outside the {img.width}x{img.height} image")
+        return img.crop(box)
+    if name == "rotate":
+        return img.rotate(-op["degrees"], Image.Resampling.BICUBIC, expand=True)
+    if name == "flip":
+        if op["direction"] not in ("horizontal", "vertical"):
+            raise ValueError("flip direction must be horizontal or vertical")
+        return ImageOps.mirror(img) if op["direction"] == "horizontal" else ImageOps.flip(img)
+    if name == "blur":
+        return img.filter(ImageFilter.GaussianBlur(min(max(op["radius"], 0), 100)))
+    if name == "sharpen":
+        return img.filter(ImageFilter.UnsharpMask(min(max(op["radius"], 0), 100), op["percent"], 3))
+    if name in ("brightness", "contrast", "saturation"):
+        enhancer = {"brightness": ImageEnhance.Brightness, "contrast": ImageEnhance.Contrast,
+                    "saturation": ImageEnhance.Color}[name]
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        return enhancer(img).enhance(min(max(op["factor"], 0), 10))
+    if name == "grayscale":
+        return img.convert("LA" if "A" in img.getbands() else "L")
+    if name == "watermark":
+        return _draw_watermark(img, op)
+    raise ValueError(f"Unknown operation '{name}'")
+
+WATERMARK_POSITIONS = ("top-left", "top-right", "bottom-left", "bottom-right", "center")
+
+def _draw_watermark(img, op):
+    # Outlined text on a transparent overlay, so it reads on light and dark images
+    text = (op["text"] or "").strip()
+    if not text:
+        raise ValueError("watermark needs text")
+    if op["position"] not in WATERMARK_POSITIONS:
+        raise ValueError(f"watermark position must be one of: {', '.join(WATERMARK_POSITIONS)}")
+    base = img.convert("RGBA")
+    size = min(max(op["font_size"] or min(base.size) // 20, 8), 1000)
+    font = ImageFont.load_default(size=size)
+    stroke = max(1, size // 15)
+    overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font, stroke_width=stroke)
+    width, height, margin = right - left, bottom - top, size // 2
+    vertical, _, horizontal = op["position"].partition("-")
+    x = {"left": margin, "right": base.width - width - margin}.get(horizontal, (base.width - width) // 2)
+    y = {"top": margin, "bottom": base.height - height - margin}.get(vertical, (base.height - height) // 2)
+    alpha = round(255 * min(max(op["opacity"], 0), 1))
+    draw.text(
+        (x - left, y - top), text, font=font, fill=(255, 255, 255, alpha),
+        stroke_width=stroke, stroke_fill=(0, 0, 0, alpha),
+    )
+    result = Image.alpha_composite(base, overlay)
+    return result if "A" in img.getbands() else result.convert("RGB")
+
+def encode_image(img, fmt, quality):
+    pil_format = IMAGE_OUTPUT_FORMATS[fmt][0]
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        # JPEG has no alpha; flatten onto white
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        img = background
+    elif img.mode not in ("RGB", "RGBA", "L", "LA", "P", "1"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    out = io.BytesIO()
+    if fmt == "png":
+        img.save(out, pil_format, optimize=True)
+    else:
+        img.save(out, pil_format, quality=quality)
+    return out.getvalue()
+
+def _run_image_pipeline(data, ops, fmt, quality):
+    # A leading resize lets JPEG decoding skip straight to a reduced scale
+    # (draft keeps both sides at least as large as requested)
+    draft = None
+    if ops and ops[0]["op"] == "resize" and (ops[0]["width"] or ops[0]["height"]):
+        draft = (ops[0]["width"] or 1, ops[0]["height"] or 1)
+    img = open_image(data, draft)
+    for op in ops:
+        img = _apply_image_op(img, op)
+    return encode_image(img, fmt, quality)
+
+def image_output_format(fmt):
+    fmt = (fmt or "").lower()
+    fmt = "jpeg" if fmt == "jpg" else fmt
+    if fmt not in IMAGE_OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(IMAGE_OUTPUT_FORMATS)}")
+    return fmt
+
+@api_router.post("/tools/image/process")
+async def process_image(file: UploadFile = File(...), operations: str = Form("[]")):
+    # operations is a JSON list applied in order, e.g.
+    # [{"op": "resize", "width": 800}, {"op": "sharpen"}, {"op": "format", "format": "webp", "quality": 80}]
+    try:
+        items = json.loads(operations)
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise TypeError("expected a JSON list of objects")
+        ops = [ImageOperation(**item) for item in items]
+    except (json.JSONDecodeError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid operations: {e}")
+    if len(ops) > IMAGE_PIPELINE_MAX_OPS:
+        raise HTTPException(status_code=400, detail=f"At most {IMAGE_PIPELINE_MAX_OPS} operations")
+    
+    # The last format op decides the encoding; default keeps the upload's own type
+    fmt, quality = None, 85
+    for op in ops:
+        if op.op == "format":
+            fmt, quality = image_output_format(op.format), min(max(op.quality, 1), 100)
+    if fmt is None:
+        suffix = Path(file.filename or "").suffix.lower().lstrip(".")
+        fmt = image_output_format(suffix) if suffix in ("jpg", "jpeg", "webp", "avif") else "png"
+    
+    data = await read_image_upload(file)
+    steps = [op.model_dump() for op in ops if op.op != "format"]
+    try:
+        output = await run_in_process(_run_image_pipeline, data, steps, fmt, quality, timeout=IMAGE_TASK_TIMEOUT)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    _, media_type, extension = IMAGE_OUTPUT_FORMATS[fmt]
+    stem = Path(file.filename or "image").stem or "image"
+    return StreamingResponse(
+        io.BytesIO(output),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{stem}.{extension}"'},
+    )
+
+
+FAVICON_SIZES = (16, 32, 48, 64)
+APPLE_TOUCH_SIZES = (180, 167, 152, 120)
+ANDROID_ICON_SIZES = (192, 512)
+THUMBNAIL_WIDTHS = (320, 480, 640, 768, 1024, 1280, 1536, 2048)
+
+def _reduction_pyramid(img, sizes):
+    """Resize to every size, each level derived from the previous larger one."""
+    levels = {}
+    current = img
+    for size in sorted(set(sizes), key=lambda s: s[0] * s[1], reverse=True):
+        if current.size != size:
+            current = current.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        levels[size] = current
+    return levels
+
+def _encode_png(img):
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    return out.getvalue()
+
+def _render_icon_set(data, output, thumbnails, thumbnail_format, stem):
+    largest_icon = max(ANDROID_ICON_SIZES + APPLE_TOUCH_SIZES + FAVICON_SIZES)
+    draft = (max(THUMBNAIL_WIDTHS) if thumbnails else largest_icon, largest_icon)
+    img = open_image(data, draft if output == "zip" else (max(FAVICON_SIZES),) * 2)
+    img = img.convert("RGBA")
     
-    img = qr.make_image(fill_color="black", back_color="white")
+    # Icons come from the centered square; each one is a level of one pyramid
+    side = min(img.size)
+    square = ImageOps.fit(img, (side, side)) if img.width != img.height else img
+    icon_sizes = FAVICON_SIZES if output == "ico" else FAVICON_SIZES + APPLE_TOUCH_SIZES + ANDROID_ICON_SIZES
+    icons = _reduction_pyramid(square, [(n, n) for n in icon_sizes])
     
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.read()).decode()
+    ico = io.BytesIO()
+    favicons = [icons[(n, n)] for n in FAVICON_SIZES]
+    favicons[-1].save(ico, "ICO", sizes=[(n, n) for n in FAVICON_SIZES], append_images=favicons[:-1])
+    if output == "ico":
+        return ico.getvalue()
     
-    return {"image": f"data:image/png;base64,{img_base64}"}
+    files = [("favicon.ico", ico.getvalue())]
+    files += [(f"favicon-{n}x{n}.png", _encode_png(icons[(n, n)])) for n in (16, 32)]
+    files.append(("apple-touch-icon.png", _encode_png(icons[(180, 180)])))
+    files += [(f"apple-touch-icon-{n}x{n}.png", _encode_png(icons[(n, n)])) for n in APPLE_TOUCH_SIZES[1:]]
+    files += [(f"android-chrome-{n}x{n}.png", _encode_png(icons[(n, n)])) for n in ANDROID_ICON_SIZES]
+    if thumbnails:
+        widths = [w for w in THUMBNAIL_WIDTHS if w <= img.width] or [img.width]
+        sizes = {w: (w, max(1, round(img.height * w / img.width))) for w in widths}
+        levels = _reduction_pyramid(img, sizes.values())
+        extension = IMAGE_OUTPUT_FORMATS[thumbnail_format][2]
+        files += [
+            (f"thumbnails/{stem}-{w}w.{extension}", encode_image(levels[size], thumbnail_format, 82))
+            for w, size in sizes.items()
+        ]
+    return files
 
-@api_router.post("/tools/misc/password")
-async def generate_password(req: PasswordRequest):
-    chars = ""
-    if req.include_uppercase:
-        chars += string.ascii_uppercase
-    if req.include_lowercase:
-        chars += string.ascii_lowercase
-    if req.include_numbers:
-        chars += string.digits
-    if req.include_symbols:
-        chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
+@api_router.post("/tools/image/icons")
+async def generate_image_icons(
+    file: UploadFile = File(...),
+    output: str = Form("zip"),
+    thumbnails: bool = Form(True),
+    thumbnail_format: str = Form("webp"),
+):
+    # output=ico returns only the multi-size favicon.ico; zip adds PNG icons
+    # (favicon, apple-touch, android) and responsive thumbnails
+    if output not in ("zip", "ico"):
+        raise HTTPException(status_code=400, detail="output must be 'zip' or 'ico'")
+    fmt = image_output_format(thumbnail_format)
+    stem = re.sub(r"[^A-Za-z0-9._-]+", "_", Path(file.filename or "image").stem) or "image"
+    data = await read_image_upload(file)
+    try:
+        result = await run_in_process(
+            _render_icon_set, data, output, thumbnails, fmt, stem, timeout=IMAGE_TASK_TIMEOUT
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    if not chars:
-        raise HTTPException(status_code=400, detail="Must include at least one character type")
+    if output == "ico":
+        return StreamingResponse(
+            io.BytesIO(result),
+            media_type="image/x-icon",
+            headers={"Content-Disposition": 'attachment; filename="favicon.ico"'},
+        )
     
-    password = "".join(secrets.choice(chars) for _ in range(req.length))
-    return {"password": password}
-
-@api_router.post("/tools/misc/shuffle")
-async def shuffle_list(req: ShuffleRequest):
-    items = req.items.copy()
-    random.shuffle(items)
-    return {"shuffled": items}
+    def stream():
+        sink = ZipStreamSink()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name, content in result:
+                zf.writestr(name, content)
+                yield sink.pop()
+        yield sink.pop()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{stem}-icons.zip"'},
+    )
 
-@api_router.get("/tools/misc/uuid")
-async def generate_uuid():
-    return {"uuid": str(uuid.uuid4())}
 
+# Compression search: every (image, format) pair is one process-pool task that
+# finds the cheapest setting meeting the quality target for that format
+OPTIMIZE_FORMATS = ("jpeg", "webp", "png", "avif")
+OPTIMIZE_DEFAULT_TARGETS = {"ssim": 0.98, "psnr": 40.0}
+OPTIMIZE_MAX_FILES = 50
+OPTIMIZE_METRIC_PIXELS = 4_000_000  # larger images are scored at a reduced scale
+OPTIMIZE_PALETTE_SIZES = (256, 128, 64, 32, 16)
+OPTIMIZE_QUALITY_RANGE = (10, 95)
 
-# ============================================
-# ROUTES - CODE TOOLS
-# ============================================
+def _metric_pixels(img):
+    # What a viewer sees: alpha composited onto white, reduced for huge images
+    if img.mode != "RGB":
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    factor = math.ceil(math.sqrt(img.width * img.height / OPTIMIZE_METRIC_PIXELS))
+    if factor > 1:
+        img = img.reduce(factor)
+    return np.asarray(img, dtype=np.float32)
 
-@api_router.post("/tools/code/json-format")
-async def format_json(data: dict):
-    try:
-        formatted = json.dumps(data.get("json_str"), indent=2)
-        return {"result": formatted}
-    except:
-        raise HTTPException(status_code=400, detail="Invalid JSON")
+def image_ssim(a, b, block=8):
+    """Mean SSIM of the luma channels over non-overlapping 8x8 blocks."""
+    weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    x, y = a @ weights, b @ weights
+    h, w = (x.shape[0] // block) * block, (x.shape[1] // block) * block
+    if not h or not w:
+        return 1.0 if np.array_equal(x, y) else 0.0
+    
+    def blocks(z):
+        return z[:h, :w].astype(np.float64).reshape(h // block, block, w // block, block)
+    
+    x, y = blocks(x), blocks(y)
+    mx, my = x.mean(axis=(1, 3)), y.mean(axis=(1, 3))
+    vx, vy = x.var(axis=(1, 3)), y.var(axis=(1, 3))
+    cov = (x * y).mean(axis=(1, 3)) - mx * my
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    ssim = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(ssim.mean())
 
+def image_psnr(a, b):
+    mse = float(np.mean((a.astype(np.float64) - b) ** 2))
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
 
-# ============================================
-# ROUTES - UNIT CONVERTERS
-# ============================================
+def _encode_candidate(img, fmt, **options):
+    # Settings favour encode speed where the size cost is small (AVIF speed 8,
+    # zlib's default level for truecolor PNG) since the search encodes many times
+    out = io.BytesIO()
+    if fmt == "jpeg":
+        img.save(out, "JPEG", optimize=True, progressive=True, **options)
+    elif fmt == "png":
+        img.save(out, "PNG", optimize=img.mode == "P", **options)
+    elif fmt == "avif":
+        img.save(out, "AVIF", speed=8, **options)
+    else:
+        img.save(out, "WEBP", **options)
+    return out.getvalue()
 
-@api_router.post("/tools/convert/units")
-async def convert_units(req: UnitConvertRequest):
-    category = req.category
-    value = req.value
-    from_unit = req.from_unit
-    to_unit = req.to_unit
-    
-    conversions = {
-        "length": {
-            "meter": 1,
-            "kilometer": 0.001,
-            "centimeter": 100,
-            "millimeter": 1000,
-            "mile": 0.000621371,
-            "yard": 1.09361,
-            "foot": 3.28084,
-            "inch": 39.3701
-        },
-        "weight": {
-            "kilogram": 1,
-            "gram": 1000,
-            "milligram": 1000000,
-            "pound": 2.20462,
-            "ounce": 35.274
-        },
-        "temperature": {
-            "celsius": lambda c: c,
-            "fahrenheit": lambda c: (c * 9/5) + 32,
-            "kelvin": lambda c: c + 273.15
-        },
-        "data": {
-            "byte": 1,
-            "kilobyte": 0.001,
-            "megabyte": 0.000001,
-            "gigabyte": 0.000000001,
-            "terabyte": 0.000000000001
-        }
-    }
+def _optimize_format(data, fmt, metric, target):
+    img = open_image(data)
+    has_alpha = "A" in img.getbands() or "transparency" in img.info
+    if fmt == "jpeg" and has_alpha:
+        return {"format": fmt, "skipped": "JPEG cannot keep transparency"}
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    reference = _metric_pixels(img)
+    score_of = image_ssim if metric == "ssim" else image_psnr
+    candidates = []
     
-    if category == "temperature":
-        if from_unit == "celsius":
-            celsius_value = value
-        elif from_unit == "fahrenheit":
-            celsius_value = (value - 32) * 5/9
-        elif from_unit == "kelvin":
-            celsius_value = value - 273.15
-        
-        result = conversions[category][to_unit](celsius_value)
+    def trial(encoded, **setting):
+        score = score_of(reference, _metric_pixels(Image.open(io.BytesIO(encoded))))
+        candidate = {"format": fmt, **setting, "bytes": len(encoded), "score": score, "meets_target": score >= target}
+        candidates.append(candidate)
+        return candidate, encoded
+    
+    passing = []
+    if fmt == "png":
+        encoded = _encode_candidate(img, "png")
+        lossless = {"format": fmt, "lossless": True, "bytes": len(encoded), "score": math.inf}
+        candidates.append(lossless)
+        passing.append((lossless, encoded))
+        for colors in OPTIMIZE_PALETTE_SIZES:
+            quantized = img.quantize(colors, method=Image.Quantize.FASTOCTREE)
+            candidate, encoded = trial(_encode_candidate(quantized, "png"), colors=colors)
+            if not candidate["meets_target"]:
+                break  # fewer colors only gets worse
+            passing.append((candidate, encoded))
     else:
-        conversion_table = conversions.get(category, {})
-        base_value = value / conversion_table.get(from_unit, 1)
-        result = base_value * conversion_table.get(to_unit, 1)
+        # Quality is close enough to monotonic for a binary search
+        low, high = OPTIMIZE_QUALITY_RANGE
+        while low <= high:
+            quality = (low + high) // 2
+            candidate, encoded = trial(_encode_candidate(img, fmt, quality=quality), quality=quality)
+            if candidate["meets_target"]:
+                passing.append((candidate, encoded))
+                high = quality - 1
+            else:
+                low = quality + 1
+        if fmt == "webp":
+            encoded = _encode_candidate(img, "webp", lossless=True, method=0)
+            lossless = {"format": fmt, "lossless": True, "bytes": len(encoded), "score": math.inf}
+            candidates.append(lossless)
+            passing.append((lossless, encoded))
     
-    return {"result": round(result, 6)}
+    best = min(passing, key=lambda pair: pair[0]["bytes"], default=None)
+    return {
+        "format": fmt,
+        "best": best[0] if best else None,
+        "data": best[1] if best else None,
+        "candidates": candidates,
+    }
 
+def _optimize_timeout(fmt):
+    # Each encoding tried is one image operation's worth of work
+    if fmt == "png":
+        trials = 1 + len(OPTIMIZE_PALETTE_SIZES)
+    else:
+        low, high = OPTIMIZE_QUALITY_RANGE
+        trials = (high - low + 1).bit_length() + (fmt == "webp")
+    return IMAGE_TASK_TIMEOUT * trials
 
-# ============================================
-# ROUTES - GENERATORS
-# ============================================
+def _report_score(value):
+    return None if value is None or math.isinf(value) else round(value, 4)
 
-@api_router.post("/tools/generate/username")
-async def generate_username(req: UsernameGenerateRequest):
-    if req.style == "random":
-        chars = string.ascii_lowercase + string.digits
-        username = "".join(random.choice(chars) for _ in range(req.length))
-    elif req.style == "fantasy":
-        prefixes = ["dark", "shadow", "fire", "ice", "storm", "blade", "moon", "star"]
-        suffixes = ["walker", "rider", "hunter", "mage", "lord", "keeper", "slayer"]
-        username = random.choice(prefixes) + random.choice(suffixes) + str(random.randint(1, 999))
-    else:  # business
-        first = ["john", "jane", "alex", "chris", "sam", "jordan", "taylor"]
-        last = ["smith", "johnson", "williams", "brown", "jones"]
-        username = random.choice(first) + "." + random.choice(last) + str(random.randint(1, 99))
-    
-    return {"username": username}
+def _clean_candidate(candidate):
+    return {**candidate, "score": _report_score(candidate.get("score"))}
 
-@api_router.post("/tools/generate/email")
-async def generate_email(req: EmailGenerateRequest):
-    if req.name:
-        local_part = req.name.lower().replace(" ", ".")
-    else:
-        local_part = "user" + str(random.randint(1000, 9999))
+@api_router.post("/tools/image/optimize")
+async def optimize_images(
+    files: List[UploadFile] = File(...),
+    metric: str = Form("ssim"),
+    target: Optional[float] = Form(None),
+    formats: str = Form("jpeg,webp,png"),
+    report_only: bool = Form(False),
+):
+    # Returns a ZIP of the smallest passing encoding per file plus report.json
+    # (or just the report). The original is kept when nothing beats it.
+    if metric not in OPTIMIZE_DEFAULT_TARGETS:
+        raise HTTPException(status_code=400, detail="metric must be 'ssim' or 'psnr'")
+    target = OPTIMIZE_DEFAULT_TARGETS[metric] if target is None else target
+    wanted = [f.strip().lower().replace("jpg", "jpeg") for f in formats.split(",") if f.strip()]
+    unknown = sorted(set(wanted) - set(OPTIMIZE_FORMATS))
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"formats must be chosen from: {', '.join(OPTIMIZE_FORMATS)}")
+    if len(files) > OPTIMIZE_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {OPTIMIZE_MAX_FILES} files per request")
+    uploads = [(upload.filename or f"image_{n}", await read_image_upload(upload)) for n, upload in enumerate(files, 1)]
     
-    email = f"{local_part}@{req.domain}"
-    return {"email": email}
-
-@api_router.post("/tools/generate/barcode")
-async def generate_barcode_image(req: BarcodeGenerateRequest):
     try:
-        CODE128 = barcode.get_barcode_class('code128')
-        barcode_instance = CODE128(req.data, writer=ImageWriter())
-        
-        buffer = io.BytesIO()
-        barcode_instance.write(buffer)
-        buffer.seek(0)
-        
-        img_base64 = base64.b64encode(buffer.read()).decode()
-        return {"image": f"data:image/png;base64,{img_base64}"}
-    except Exception as e:
+        results = await asyncio.gather(*(
+            run_in_process(_optimize_format, data, fmt, metric, target, timeout=_optimize_timeout(fmt), wait=True)
+            for _, data in uploads for fmt in wanted
+        ))
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    report, outputs, seen = [], [], set()
+    for n, (filename, data) in enumerate(uploads):
+        per_format = results[n * len(wanted):(n + 1) * len(wanted)]
+        passing = [r for r in per_format if r.get("best")]
+        best = min(passing, key=lambda r: r["best"]["bytes"], default=None)
+        original_format = (Image.open(io.BytesIO(data)).format or "").lower()
+        stem = Path(filename).stem or f"image_{n + 1}"
+        if best is None or best["best"]["bytes"] >= len(data):
+            chosen, content = {"format": "original", "bytes": len(data)}, data
+            extension = Path(filename).suffix.lstrip(".").lower() or original_format or "bin"
+        else:
+            chosen, content = _clean_candidate(best["best"]), best["data"]
+            extension = IMAGE_OUTPUT_FORMATS[best["format"]][2]
+        name = safe_archive_name(stem, f"image_{n + 1}", extension, seen)
+        outputs.append((name, content))
+        report.append({
+            "filename": filename,
+            "output": name,
+            "original_format": original_format,
+            "original_bytes": len(data),
+            "chosen": chosen,
+            "saving_percent": round(100 * (1 - chosen["bytes"] / len(data)), 2),
+            "candidates": [_clean_candidate(c) for r in per_format for c in r.get("candidates", [])],
+            "skipped": {r["format"]: r["skipped"] for r in per_format if r.get("skipped")},
+        })
+    summary = {"metric": metric, "target": target, "files": report}
+    if report_only:
+        return summary
+    
+    def stream():
+        sink = ZipStreamSink()
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name, content in outputs:
+                zf.writestr(name, content)
+                yield sink.pop()
+            zf.writestr("report.json", json.dumps(summary, indent=2))
+        yield sink.pop()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="optimized.zip"'},
+    )
 
 
 # ============================================
 # ROUTES - MATH TOOLS
 # ============================================
 
+CALC_MAX_LENGTH = 1000
+# Integers are kept below Python's 4300-digit str() limit so results serialize
+CALC_MAX_INT_BITS = 14000
+# Largest n whose factorial still fits in CALC_MAX_INT_BITS (1531)
+CALC_MAX_FACTORIAL = next(
+    n for n in range(CALC_MAX_INT_BITS) if math.lgamma(n + 2) / math.log(2) >= CALC_MAX_INT_BITS
+)
+
+def _calc_pow(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if exponent * math.log2(abs(base)) > CALC_MAX_INT_BITS:
+            raise ValueError("Exponent is too large")
+    result = base ** exponent
+    if isinstance(result, complex):
+        # e.g. (-8) ** (1/3); Python would silently switch to complex numbers
+        raise ValueError("Result is not a real number")
+    return result
+
+def _calc_factorial(n):
+    if n != int(n) or n < 0:
+        raise ValueError("factorial() needs a non-negative integer")
+    if n > CALC_MAX_FACTORIAL:
+        raise ValueError(f"factorial() is limited to n <= {CALC_MAX_FACTORIAL}")
+    return math.factorial(int(n))
+
+CALC_FUNCTIONS = {
+    "abs": abs, "round": round, "min": min, "max": max,
+    "sqrt": math.sqrt, "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    "exp": math.exp, "log": math.log, "log10": math.log10, "log2": math.log2,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "floor": math.floor, "ceil": math.ceil, "hypot": math.hypot,
+    "degrees": math.degrees, "radians": math.radians,
+    "factorial": _calc_factorial, "pow": _calc_pow,
+}
+CALC_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+_CALC_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_CALC_UNARYOPS = (ast.UAdd, ast.USub)
+
+class _CalcCompiler(ast.NodeTransformer):
+    # Whitelists arithmetic, calls to CALC_FUNCTIONS, constants and variables,
+    # and routes ** through the cost-checked _calc_pow.
+    def __init__(self):
+        self.variables = set()
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node):
+        if type(node.value) not in (int, float):
+            raise ValueError("Only numbers are allowed")
+        return node
+
+    def visit_Name(self, node):
+        if node.id.startswith("_"):
+            raise ValueError(f"Invalid name '{node.id}'")
+        if node.id in CALC_FUNCTIONS:
+            raise ValueError(f"'{node.id}' is a function")
+        if node.id not in CALC_CONSTANTS:
+            self.variables.add(node.id)
+        return node
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _CALC_UNARYOPS):
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _CALC_BINOPS):
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(ast.Call(ast.Name("_pow", ast.Load()), [left, right], []), node)
+        node.left, node.right = left, right
+        return node
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in CALC_FUNCTIONS or node.keywords:
+            raise ValueError("Only calls to the built-in math functions are allowed")
+        node.args = [self.visit(arg) for arg in node.args]
+        if any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ValueError("Unsupported syntax: Starred")
+        return node
+
+class CompiledExpression:
+    def __init__(self, expression):
+        if len(expression) > CALC_MAX_LENGTH:
+            raise ValueError(f"Expression is limited to {CALC_MAX_LENGTH} characters")
+        compiler = _CalcCompiler()
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+            # Deeply nested input (e.g. "-" * 990 + "1") can overflow the
+            # recursive visitor or the bytecode compiler, not just the parser
+            tree = ast.fix_missing_locations(compiler.visit(tree))
+            self.code = compile(tree, "<expression>", "eval")
+        except (SyntaxError, RecursionError, MemoryError):
+            raise ValueError("Invalid expression")
+        self.expression = expression
+        self.variables = frozenset(compiler.variables)
+
+    def evaluate(self, variables=None, functions=None, constants=None, power=_calc_pow):
+        variables = variables or {}
+        missing = sorted(self.variables - variables.keys())
+        if missing:
+            raise ValueError(f"Missing value for variable(s): {', '.join(missing)}")
+        namespace = {**(constants or CALC_CONSTANTS), **variables, **(functions or CALC_FUNCTIONS), "_pow": power}
+        return eval(self.code, {"__builtins__": {}}, namespace)
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expression):
+    return CompiledExpression(expression)
+
+def _evaluate_expression(expression, variables):
+    try:
+        result = compile_expression(expression).evaluate(variables)
+    except ZeroDivisionError:
+        raise ValueError("Division by zero")
+    except OverflowError:
+        raise ValueError("Result is too large")
+    except TypeError as e:
+        raise ValueError(str(e))
+    if isinstance(result, int) and result.bit_length() > CALC_MAX_INT_BITS:
+        raise ValueError("Result is too large")
+    if isinstance(result, complex):
+        raise ValueError("Result is not a real number")
+    if isinstance(result, float) and not math.isfinite(result):
+        raise ValueError("Result is not a finite number")
+    return result
+
 @api_router.post("/tools/math/calculate")
 async def calculate(req: CalculatorRequest):
     try:
-        result = eval(req.expression)
-        return {"result": result}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail="Invalid expression")
+        # Validates the expression up front; the worker reuses its own cached copy
+        compile_expression(req.expression)
+        result = await killable_pool.run(
+            _evaluate_expression, req.expression, req.variables, timeout=CALC_TIMEOUT
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid expression: {e}")
+    return {"result": result}
+
+# The same compiled expression runs over whole columns with NumPy ufuncs
+CALC_BATCH_CHUNK_ROWS = 100_000
+# JSON has to be parsed in one piece, unlike CSV, so its size is capped
+CALC_BATCH_JSON_MAX_BYTES = 64 * 1024 * 1024
+
+def _vector_reduce(ufunc):
+    return lambda *args: functools.reduce(ufunc, args)
+
+# 0! .. 170! followed by inf, since 171! overflows a float
+_FACTORIAL_TABLE = np.array([float(math.factorial(n)) for n in range(171)] + [np.inf])
+
+def _vector_factorial(n):
+    n = np.asarray(n, dtype=float)
+    valid = (n >= 0) & ((n == np.floor(n)) | (n > 170))
+    index = np.where(valid, np.minimum(n, 171), 0).astype(np.intp)
+    return np.where(valid, np.take(_FACTORIAL_TABLE, index), np.nan)
+
+VECTOR_FUNCTIONS = {
+    "abs": np.abs, "round": np.round, "min": _vector_reduce(np.minimum), "max": _vector_reduce(np.maximum),
+    "sqrt": np.sqrt, "cbrt": np.cbrt,
+    "exp": np.exp, "log": lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base),
+    "log10": np.log10, "log2": np.log2,
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan, "atan2": np.arctan2,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "floor": np.floor, "ceil": np.ceil, "hypot": np.hypot,
+    "degrees": np.degrees, "radians": np.radians,
+    "factorial": _vector_factorial, "pow": np.power,
+}
+
+def _vector_pow(base, exponent):
+    # Float powers overflow to inf instead of building huge integers
+    return np.power(np.asarray(base, dtype=float), exponent)
+
+def evaluate_vector(compiled, columns, rows):
+    with np.errstate(all="ignore"):
+        result = compiled.evaluate(columns, functions=VECTOR_FUNCTIONS, power=_vector_pow)
+    return np.broadcast_to(np.asarray(result, dtype=float), (rows,))
+
+def _to_float_column(values):
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        # Slow path only for chunks that contain blanks or text
+        out = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+def _format_floats(values):
+    return ["" if np.isnan(v) else repr(float(v)) for v in values.tolist()]
+
+def _load_json_columns(fileobj, variables):
+    try:
+        data = json.load(fileobj)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("Invalid JSON upload")
+    if not isinstance(data, dict):
+        raise ValueError("JSON upload must be an object of arrays")
+    missing = sorted(variables - data.keys())
+    if missing:
+        raise ValueError(f"Missing variable(s): {', '.join(missing)}")
+    names = sorted(variables)
+    try:
+        columns = {n: np.asarray(data[n], dtype=float) for n in names}
+        rows = max([c.size for c in columns.values()] + [1])
+        columns = {n: np.broadcast_to(c, (rows,)) for n, c in columns.items()}
+    except (ValueError, TypeError):
+        raise ValueError("Variables must be numbers or equal-length arrays of numbers")
+    return names, columns, rows
+
+def _read_csv_header(reader):
+    # The first row can be arbitrarily long, so it is read off the event loop
+    return [h.strip() for h in next(reader, [])]
+
+@api_router.post("/tools/math/calculate/batch")
+async def calculate_batch(
+    file: UploadFile = File(...),
+    expression: str = Form(...),
+    output_column: str = Form("result"),
+):
+    # CSV uploads need a header row naming the variables; JSON uploads are an
+    # object of equal-length arrays (scalars are broadcast). Streams CSV back.
+    try:
+        compiled = compile_expression(expression)
+        evaluate_vector(compiled, {name: np.zeros(1) for name in compiled.variables}, 1)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid expression: {e}")
+    
+    name = (file.filename or "").lower()
+    if name.endswith(".json") or file.content_type == "application/json":
+        # Checked before parsing: a JSON document can only be loaded whole
+        if _upload_size(file.file) > CALC_BATCH_JSON_MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"JSON uploads are limited to {CALC_BATCH_JSON_MAX_BYTES} bytes; use CSV for larger data",
+            )
+        try:
+            names, columns, rows = await run_in_thread(
+                _load_json_columns, file.file, compiled.variables, timeout=FILE_TASK_TIMEOUT
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        def stream_json():
+            out = io.StringIO()
+            writer = csv.writer(out)
+            writer.writerow([*names, output_column])
+            yield out.getvalue()
+            for start in range(0, rows, CALC_BATCH_CHUNK_ROWS):
+                chunk = {n: c[start:start + CALC_BATCH_CHUNK_ROWS] for n, c in columns.items()}
+                size = min(CALC_BATCH_CHUNK_ROWS, rows - start)
+                result = evaluate_vector(compiled, chunk, size)
+                out.seek(0)
+                out.truncate()
+                writer.writerows(zip(*(_format_floats(chunk[n]) for n in names), _format_floats(result)))
+                yield out.getvalue()
+        
+        body = stream_json()
+    else:
+        spool = detach_upload(file)
+        reader = csv.reader(io.TextIOWrapper(spool, encoding="utf-8-sig", newline=""))
+        try:
+            header = await run_in_thread(_read_csv_header, reader)
+        except UnicodeDecodeError:
+            spool.close()
+            raise HTTPException(status_code=400, detail="CSV upload must be UTF-8 text")
+        except BaseException:
+            spool.close()
+            raise
+        missing = sorted(compiled.variables - set(header))
+        if missing:
+            spool.close()
+            raise HTTPException(status_code=400, detail=f"Missing column(s): {', '.join(missing)}")
+        indexes = {n: header.index(n) for n in compiled.variables}
+        
+        def stream_csv():
+            out = io.StringIO()
+            writer = csv.writer(out)
+            try:
+                writer.writerow([*header, output_column])
+                yield out.getvalue()
+                for chunk in batched(reader, CALC_BATCH_CHUNK_ROWS):
+                    columns = {
+                        n: _to_float_column([row[i] if i < len(row) else "" for row in chunk])
+                        for n, i in indexes.items()
+                    }
+                    result = _format_floats(evaluate_vector(compiled, columns, len(chunk)))
+                    out.seek(0)
+                    out.truncate()
+                    writer.writerows(row + [value] for row, value in zip(chunk, result))
+                    yield out.getvalue()
+            finally:
+                spool.close()
+        
+        body = stream_csv()
+    
+    return StreamingResponse(
+        body,
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="results.csv"'},
+    )
 
 @api_router.post("/tools/math/percentage")
 async def calculate_percentage(req: PercentageRequest):
@@ -623,64 +3885,773 @@ async def generate_open_graph(title: str, description: str, image: str = "", url
     return {"html": og_tags}
 
 
+# ============================================
+# DIFF ENGINE
+# ============================================
+
+# Myers' O(ND) algorithm in its linear-space form. Inputs are sequences of
+# integers (lines interned to ids), so every comparison is an int compare.
+
+def _middle_snake(a, alo, ahi, b, blo, bhi):
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta & 1
+    offset = n + m + 1
+    vf = [0] * (2 * offset + 1)
+    vb = [0] * (2 * offset + 1)
+    for d in range((n + m + 1) // 2 + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+                x = vf[offset + k + 1]
+            else:
+                x = vf[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            vf[offset + k] = x
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + vb[offset + delta - k] >= n:
+                return 2 * d - 1, x0, y0, x, y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vb[offset + k - 1] < vb[offset + k + 1]):
+                x = vb[offset + k + 1]
+            else:
+                x = vb[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            vb[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + vf[offset + delta - k] >= n:
+                return 2 * d, n - x, m - y, n - x0, m - y0
+    raise AssertionError("middle snake not found")
+
+def _matching_runs(a, b, alo, ahi, blo, bhi):
+    # Returns (i, j, length) runs of equal items, in order
+    runs = []
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        n, m = ahi - alo, bhi - blo
+        if n == 0 or m == 0:
+            continue
+        d, x, y, u, v = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if d > 1:
+            if u > x:
+                runs.append((alo + x, blo + y, u - x))
+            stack.append((alo + u, ahi, blo + v, bhi))
+            stack.append((alo, alo + x, blo, blo + y))
+        elif d == 1:
+            # Exactly one insertion or deletion: the shorter side is a
+            # subsequence of the longer one with a single item skipped
+            i, j = alo, blo
+            while i < ahi and j < bhi and a[i] == b[j]:
+                i += 1
+                j += 1
+            if i > alo:
+                runs.append((alo, blo, i - alo))
+            if n > m:
+                i += 1
+            else:
+                j += 1
+            if i < ahi:
+                runs.append((i, j, ahi - i))
+        else:
+            runs.append((alo, blo, n))
+    runs.sort()
+    return runs
+
+def _filtered_runs(a, b, alo, ahi, blo, bhi):
+    # Items that occur on only one side can never match; dropping them before
+    # the search keeps D small when whole blocks were rewritten.
+    # Typed arrays keep this compact for inputs with millions of lines.
+    a_items, b_items = set(a[alo:ahi]), set(b[blo:bhi])
+    a_keep = array("q", (i for i in range(alo, ahi) if a[i] in b_items))
+    b_keep = array("q", (j for j in range(blo, bhi) if b[j] in a_items))
+    del a_items, b_items
+    fa = array("q", (a[i] for i in a_keep))
+    fb = array("q", (b[j] for j in b_keep))
+    
+    runs = []
+    for fi, fj, size in _matching_runs(fa, fb, 0, len(fa), 0, len(fb)):
+        for t in range(size):
+            i, j = a_keep[fi + t], b_keep[fj + t]
+            if runs and runs[-1][0] + runs[-1][2] == i and runs[-1][1] + runs[-1][2] == j:
+                runs[-1][2] += 1
+            else:
+                runs.append([i, j, 1])
+    return [tuple(run) for run in runs]
+
+def diff_opcodes(a, b):
+    # difflib-style (tag, i1, i2, j1, j2) opcodes for the shortest edit script
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    
+    runs = []
+    if prefix:
+        runs.append((0, 0, prefix))
+    runs.extend(_filtered_runs(a, b, prefix, n - suffix, prefix, m - suffix))
+    if suffix:
+        runs.append((n - suffix, m - suffix, suffix))
+    runs.append((n, m, 0))
+    
+    opcodes = []
+    i = j = 0
+    for ri, rj, size in runs:
+        if i < ri and j < rj:
+            opcodes.append(("replace", i, ri, j, rj))
+        elif i < ri:
+            opcodes.append(("delete", i, ri, j, rj))
+        elif j < rj:
+            opcodes.append(("insert", i, ri, j, rj))
+        if size:
+            if opcodes and opcodes[-1][0] == "equal":
+                _, i1, _, j1, _ = opcodes.pop()
+                opcodes.append(("equal", i1, ri + size, j1, rj + size))
+            else:
+                opcodes.append(("equal", ri, ri + size, rj, rj + size))
+        i, j = ri + size, rj + size
+    return opcodes
+
+def group_opcodes(opcodes, context=3):
+    # Splits opcodes into hunks with `context` equal lines around each change
+    if not opcodes:
+        return []
+    codes = list(opcodes)
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    
+    groups, group = [], []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * context:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return [g for g in groups if any(code[0] != "equal" for code in g)]
+
+def intern_lines(lines, ids):
+    return [ids.setdefault(line, len(ids)) for line in lines]
+
+def intraline_spans(old, new):
+    # Character ranges that changed on each side of a replaced line pair
+    old_spans, new_spans = [], []
+    for tag, i1, i2, j1, j2 in diff_opcodes([ord(c) for c in old], [ord(c) for c in new]):
+        if tag in ("replace", "delete"):
+            old_spans.append([i1, i2])
+        if tag in ("replace", "insert"):
+            new_spans.append([j1, j2])
+    return old_spans, new_spans
+
+def _unified_range(start, stop):
+    length = stop - start
+    if length == 1:
+        return f"{start + 1}"
+    return f"{start + 1 if length else start},{length}"
+
+def iter_diff_hunks(groups, old_line, new_line, intraline=False):
+    # Yields hunks for groups from group_opcodes(); old_line/new_line fetch line i
+    for group in groups:
+        _, i1, _, j1, _ = group[0]
+        _, _, i2, _, j2 = group[-1]
+        lines = []
+        for tag, a1, a2, b1, b2 in group:
+            if tag == "equal":
+                lines.extend({"type": " ", "old": i, "new": j, "text": old_line(i)}
+                             for i, j in zip(range(a1, a2), range(b1, b2)))
+                continue
+            removed = [{"type": "-", "old": i, "text": old_line(i)} for i in range(a1, a2)]
+            added = [{"type": "+", "new": j, "text": new_line(j)} for j in range(b1, b2)]
+            if intraline and tag == "replace":
+                for old, new in zip(removed, added):
+                    old["spans"], new["spans"] = intraline_spans(old["text"], new["text"])
+            lines.extend(removed)
+            lines.extend(added)
+        for line in lines:
+            # 1-based line numbers in the output
+            for side in ("old", "new"):
+                if side in line:
+                    line[side] += 1
+        yield {
+            "header": f"@@ -{_unified_range(i1, i2)} +{_unified_range(j1, j2)} @@",
+            "old_start": i1 + 1,
+            "old_lines": i2 - i1,
+            "new_start": j1 + 1,
+            "new_lines": j2 - j1,
+            "lines": lines,
+        }
+
+def unified_diff_text(hunks, old_name="text1", new_name="text2"):
+    out = [f"--- {old_name}", f"+++ {new_name}"]
+    for hunk in hunks:
+        out.append(hunk["header"])
+        out.extend(line["type"] + line["text"] for line in hunk["lines"])
+    return "\n".join(out) + "\n" if hunks else ""
+
+def side_by_side_rows(hunks):
+    rows = []
+    for hunk in hunks:
+        removed, added = [], []
+        
+        def flush():
+            for k in range(max(len(removed), len(added))):
+                old = removed[k] if k < len(removed) else None
+                new = added[k] if k < len(added) else None
+                rows.append({
+                    "type": "replace" if old and new else ("delete" if old else "insert"),
+                    "old_line": old["old"] if old else None,
+                    "old": old["text"] if old else None,
+                    "new_line": new["new"] if new else None,
+                    "new": new["text"] if new else None,
+                })
+            removed.clear()
+            added.clear()
+        
+        rows.append({"type": "hunk", "header": hunk["header"]})
+        for line in hunk["lines"]:
+            if line["type"] == "-":
+                removed.append(line)
+            elif line["type"] == "+":
+                added.append(line)
+            else:
+                flush()
+                rows.append({"type": "equal", "old_line": line["old"], "old": line["text"],
+                             "new_line": line["new"], "new": line["text"]})
+        flush()
+    return rows
+
+
 # ============================================
 # ROUTES - DEVELOPER TOOLS
 # ============================================
 
+# "g" is accepted for JavaScript-style flag strings; finditer is always global
+REGEX_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE, "a": re.ASCII, "g": 0}
+
+@functools.lru_cache(maxsize=512)
+def compile_regex(pattern, flags=""):
+    value = 0
+    for flag in flags.lower():
+        if flag not in REGEX_FLAGS:
+            raise ValueError(f"Unknown flag '{flag}'. Use any of: {''.join(REGEX_FLAGS)}")
+        value |= REGEX_FLAGS[flag]
+    return re.compile(pattern, value)
+
+def _run_regex(pattern, flags, text, max_matches):
+    # One finditer pass yields findall-compatible matches plus spans and groups
+    compiled = compile_regex(pattern, flags)
+    matches, details = [], []
+    truncated = False
+    for match in compiled.finditer(text):
+        if len(details) >= max_matches:
+            truncated = True
+            break
+        groups = tuple("" if g is None else g for g in match.groups())
+        if compiled.groups == 0:
+            matches.append(match.group(0))
+        elif compiled.groups == 1:
+            matches.append(groups[0])
+        else:
+            matches.append(groups)
+        details.append({
+            "match": match.group(0),
+            "start": match.start(),
+            "end": match.end(),
+            "groups": list(match.groups()),
+            "named_groups": match.groupdict(),
+        })
+    return matches, details, truncated
+
 @api_router.post("/tools/dev/regex-test")
 async def test_regex(req: RegexTestRequest):
     try:
-        pattern = re.compile(req.pattern)
-        matches = pattern.findall(req.text)
-        is_match = bool(pattern.search(req.text))
-        
-        return {
-            "is_match": is_match,
-            "matches": matches,
-            "match_count": len(matches)
-        }
-    except Exception as e:
+        # Compiling here rejects bad patterns without a worker round-trip
+        compile_regex(req.pattern, req.flags)
+    except (re.error, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid regex: {str(e)}")
+    
+    max_matches = max(1, min(req.max_matches, REGEX_MAX_MATCHES))
+    try:
+        matches, details, truncated = await killable_pool.run(
+            _run_regex, req.pattern, req.flags, req.text, max_matches, timeout=REGEX_TIMEOUT
+        )
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid regex: {str(e)}")
+    
+    return {
+        "is_match": bool(matches),
+        "matches": matches,
+        "match_count": len(matches),
+        "match_details": details,
+        "truncated": truncated,
+    }
 
-@api_router.post("/tools/dev/diff")
-async def check_diff(req: DiffCheckRequest):
-    lines1 = req.text1.split('\n')
-    lines2 = req.text2.split('\n')
+# Uploaded files are scanned in killable workers, one segment at a time, under
+# a single deadline: a pattern that backtracks catastrophically anywhere in the
+# file gets its worker killed instead of pinning a server thread.
+REGEX_SCAN_SEGMENT_BYTES = 8 * 1024 * 1024
+REGEX_SCAN_BATCH = 1000  # matches returned per worker round-trip
+
+def _regex_scan_segment(path, pattern, flags, pos, line, skip_empty, max_matches, segment_bytes):
+    # Resumes finditer at pos over the whole file, so anchors and lookbehinds
+    # see the real context. After an empty match at pos, finditer is resumed
+    # at pos and the repeated empty match dropped, which leaves it in the same
+    # state as an uninterrupted scan. Returns (records, pos, line, skip_empty, done).
+    compiled = compile_regex(pattern, flags)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+    try:
+        records = []
+        last = pos
+        limit = pos + segment_bytes
+        for match in compiled.finditer(buffer, pos):
+            start, end = match.span()
+            if skip_empty and start == end == pos:
+                skip_empty = False
+                continue
+            line += buffer[last:start].count(b"\n")
+            last = start
+            records.append({
+                "type": "match",
+                "line": line,
+                "offset": start,
+                "end": end,
+                "match": match.group(0).decode("utf-8", "replace"),
+                "groups": [g.decode("utf-8", "replace") if g is not None else None for g in match.groups()],
+            })
+            if len(records) >= max_matches or end >= limit:
+                return records, end, line + buffer[start:end].count(b"\n"), start == end, False
+        return records, size, line, False, True
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+def _copy_upload_to_path(spool):
+    # Workers are separate processes, so they get the upload as a named file
+    fd, path = tempfile.mkstemp(prefix="regex-")
+    with os.fdopen(fd, "wb") as out:
+        spool.seek(0)
+        shutil.copyfileobj(spool, out, UPLOAD_CHUNK_SIZE)
+    return path
+
+@api_router.post("/tools/dev/regex-test/file")
+async def test_regex_file(
+    file: UploadFile = File(...),
+    pattern: str = Form(...),
+    flags: str = Form(""),
+    max_matches: int = Form(1000),
+):
+    # Streams NDJSON: one line per match, then a summary line with throughput.
+    # Overrunning REGEX_FILE_TIMEOUT before the first segment is done is a 504;
+    # later it ends the stream with an error line.
+    pattern_bytes = pattern.encode("utf-8")
+    try:
+        compile_regex(pattern_bytes, flags)
+    except (re.error, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid regex: {str(e)}")
+    max_matches = max(1, min(max_matches, REGEX_MAX_MATCHES))
     
-    differences = []
-    max_lines = max(len(lines1), len(lines2))
+    started = time.perf_counter()
+    deadline = time.monotonic() + REGEX_FILE_TIMEOUT
+    path = await run_in_thread(_copy_upload_to_path, file.file, timeout=FILE_TASK_TIMEOUT)
     
-    for i in range(max_lines):
-        line1 = lines1[i] if i < len(lines1) else ""
-        line2 = lines2[i] if i < len(lines2) else ""
-        
-        if line1 != line2:
+    async def scan(pos, line, skip_empty, wanted):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(status_code=504, detail="Operation exceeded its time limit")
+        return await killable_pool.run(
+            _regex_scan_segment, path, pattern_bytes, flags, pos, line, skip_empty,
+            min(REGEX_SCAN_BATCH, wanted), REGEX_SCAN_SEGMENT_BYTES, timeout=remaining,
+        )
+    
+    try:
+        # Asking for one match more than allowed tells whether output was truncated
+        first = await scan(0, 1, False, max_matches + 1)
+    except BaseException:
+        os.unlink(path)
+        raise
+    
+    async def stream():
+        records, pos, line, skip_empty, done = first
+        count = 0
+        scanned = 0
+        truncated = False
+        while True:
+            for record in records:
+                if count >= max_matches:
+                    truncated = True
+                    break
+                count += 1
+                scanned = record.pop("end")
+                yield json.dumps(record) + "\n"
+            if truncated or done:
+                break
+            try:
+                records, pos, line, skip_empty, done = await scan(pos, line, skip_empty, max_matches - count + 1)
+            except HTTPException as e:
+                yield json.dumps({"type": "error", "detail": e.detail, "match_count": count}) + "\n"
+                return
+        if not truncated:
+            scanned = pos
+        elapsed = time.perf_counter() - started
+        yield json.dumps({
+            "type": "summary",
+            "match_count": count,
+            "truncated": truncated,
+            "bytes_scanned": scanned,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "throughput_mb_s": round(scanned / 1e6 / elapsed, 2) if elapsed > 0 else None,
+        }) + "\n"
+    
+    # A background task also runs when the client disconnects mid-stream
+    return StreamingResponse(
+        stream(), media_type="application/x-ndjson", background=BackgroundTask(os.unlink, path)
+    )
+
+def _diff_texts(text1, text2, output, context, intraline):
+    lines1 = text1.split('\n')
+    lines2 = text2.split('\n')
+    ids = {}
+    opcodes = diff_opcodes(intern_lines(lines1, ids), intern_lines(lines2, ids))
+    
+    differences = []
+    insertions = deletions = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        deletions += i2 - i1
+        insertions += j2 - j1
+        for k in range(max(i2 - i1, j2 - j1)):
+            line1 = i1 + k + 1 if i1 + k < i2 else None
+            line2 = j1 + k + 1 if j1 + k < j2 else None
             differences.append({
-                "line": i + 1,
-                "text1": line1,
-                "text2": line2
+                "type": "replace" if line1 and line2 else ("delete" if line1 else "insert"),
+                "line": line1 or line2,
+                "line1": line1,
+                "line2": line2,
+                "text1": lines1[line1 - 1] if line1 else "",
+                "text2": lines2[line2 - 1] if line2 else "",
             })
     
-    return {"differences": differences, "total_differences": len(differences)}
+    groups = group_opcodes(opcodes, context)
+    hunks = list(iter_diff_hunks(groups, lines1.__getitem__, lines2.__getitem__, intraline))
+    result = {
+        "differences": differences,
+        "total_differences": len(differences),
+        "stats": {"insertions": insertions, "deletions": deletions, "hunks": len(hunks)},
+        "hunks": hunks,
+    }
+    if output == "side_by_side":
+        result["side_by_side"] = side_by_side_rows(hunks)
+    else:
+        result["unified"] = unified_diff_text(hunks)
+    return result
+
+@api_router.post("/tools/dev/diff")
+async def check_diff(req: DiffCheckRequest):
+    if req.output not in ("unified", "side_by_side"):
+        raise HTTPException(status_code=400, detail="Unsupported output. Use unified or side_by_side")
+    return await run_in_process(
+        _diff_texts, req.text1, req.text2, req.output, max(0, req.context), req.intraline
+    )
+
+DIFF_PAGE_MAX_HUNKS = 1000
+
+def map_upload(spool):
+    # Memory-maps a spooled upload (fileno() moves in-memory spools to disk)
+    spool.seek(0, os.SEEK_END)
+    if not spool.tell():
+        return b""
+    return mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _index_lines(buffer):
+    # Line hashes and start offsets as compact arrays; line i spans
+    # buffer[offsets[i]:offsets[i + 1]] including its newline.
+    hashes, offsets = array("q"), array("q", [0])
+    pos, size = 0, len(buffer)
+    while pos < size:
+        end = buffer.find(b"\n", pos)
+        end = size if end < 0 else end + 1
+        hashes.append(hash(buffer[pos:end].rstrip(b"\r\n")))
+        offsets.append(end)
+        pos = end
+    return hashes, offsets
+
+def _diff_mapped_files(buffer1, buffer2):
+    hashes1, offsets1 = _index_lines(buffer1)
+    hashes2, offsets2 = _index_lines(buffer2)
+    opcodes = diff_opcodes(hashes1, hashes2)
+    return opcodes, offsets1, offsets2, len(hashes1), len(hashes2)
+
+def _mapped_line(buffer, offsets):
+    def line(i):
+        return buffer[offsets[i]:offsets[i + 1]].rstrip(b"\r\n").decode("utf-8", "replace")
+    return line
+
+@api_router.post("/tools/dev/diff/file")
+async def check_diff_files(
+    file1: UploadFile = File(...),
+    file2: UploadFile = File(...),
+    context: int = Form(3),
+    intraline: bool = Form(False),
+    offset: int = Form(0),
+    limit: int = Form(100),
+):
+    # Streams NDJSON: a summary line, one line per hunk in the requested page,
+    # then an end line with the offset of the next page.
+    if offset < 0 or not 1 <= limit <= DIFF_PAGE_MAX_HUNKS:
+        raise HTTPException(status_code=400, detail=f"offset must be >= 0 and limit 1-{DIFF_PAGE_MAX_HUNKS}")
+    spools = [detach_upload(file1), detach_upload(file2)]
+    buffers = []
+    try:
+        buffers = [map_upload(spool) for spool in spools]
+        opcodes, offsets1, offsets2, lines1, lines2 = await run_in_thread(
+            _diff_mapped_files, *buffers, timeout=FILE_TASK_TIMEOUT
+        )
+    except BaseException:
+        for buffer in buffers:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+        for spool in spools:
+            spool.close()
+        raise
+    
+    def stream():
+        try:
+            insertions = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != "equal")
+            deletions = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != "equal")
+            groups = group_opcodes(opcodes, max(0, context))
+            total_hunks = len(groups)
+            yield json.dumps({
+                "type": "summary",
+                "file1": file1.filename,
+                "file2": file2.filename,
+                "lines1": lines1,
+                "lines2": lines2,
+                "insertions": insertions,
+                "deletions": deletions,
+                "total_hunks": total_hunks,
+                "offset": offset,
+            }) + "\n"
+            hunks = iter_diff_hunks(
+                groups[offset:offset + limit],
+                _mapped_line(buffers[0], offsets1), _mapped_line(buffers[1], offsets2), intraline,
+            )
+            for n, hunk in enumerate(hunks, offset):
+                yield json.dumps({"type": "hunk", "index": n, **hunk}) + "\n"
+            next_offset = offset + limit if offset + limit < total_hunks else None
+            yield json.dumps({"type": "end", "next_offset": next_offset}) + "\n"
+        finally:
+            for buffer in buffers:
+                if isinstance(buffer, mmap.mmap):
+                    buffer.close()
+            for spool in spools:
+                spool.close()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+HASH_ALGORITHMS = ("md5", "sha1", "sha256", "sha512", "blake2b", "sha3_256", "sha3_512")
+
+# Below this size hashing is faster than a round-trip through the thread pool
+INLINE_HASH_LIMIT = 64 * 1024
+
+def _hash_bytes(data, algorithm):
+    return hashlib.new(algorithm, data).hexdigest()
+
+def _hash_stream(fileobj, algorithms, chunk_size):
+    # One pass over the file feeds every hasher from the same reusable buffer
+    hashers = [hashlib.new(name) for name in algorithms]
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    size = 0
+    started = time.perf_counter()
+    while True:
+        n = fileobj.readinto(buffer)
+        if not n:
+            break
+        chunk = view[:n]
+        for hasher in hashers:
+            hasher.update(chunk)
+        size += n
+    elapsed = time.perf_counter() - started
+    return {name: h.hexdigest() for name, h in zip(algorithms, hashers)}, size, elapsed
+
+def parse_hash_algorithms(value):
+    algorithms = [a.strip().lower() for a in value.split(",") if a.strip()]
+    unsupported = [a for a in algorithms if a not in HASH_ALGORITHMS]
+    if not algorithms or unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported algorithm. Use any of: {', '.join(HASH_ALGORITHMS)}")
+    return list(dict.fromkeys(algorithms))
 
 @api_router.post("/tools/dev/hash")
 async def generate_hash(req: HashGenerateRequest):
     text_bytes = req.text.encode('utf-8')
     
-    algorithms = {
-        "md5": hashlib.md5,
-        "sha1": hashlib.sha1,
-        "sha256": hashlib.sha256,
-        "sha512": hashlib.sha512
-    }
-    
-    hash_func = algorithms.get(req.algorithm.lower())
-    if not hash_func:
+    algorithm = req.algorithm.lower()
+    if algorithm not in HASH_ALGORITHMS:
         raise HTTPException(status_code=400, detail="Unsupported algorithm")
     
-    result = hash_func(text_bytes).hexdigest()
+    if len(text_bytes) < INLINE_HASH_LIMIT:
+        result = _hash_bytes(text_bytes, algorithm)
+    else:
+        result = await run_in_thread(_hash_bytes, text_bytes, algorithm)
     return {"hash": result}
 
+@api_router.post("/tools/dev/hash/file")
+async def generate_file_hash(
+    file: UploadFile = File(...),
+    algorithms: str = Form(",".join(HASH_ALGORITHMS)),
+):
+    names = parse_hash_algorithms(algorithms)
+    hashes, size, elapsed = await run_in_thread(
+        _hash_stream, file.file, names, UPLOAD_CHUNK_SIZE, timeout=FILE_TASK_TIMEOUT
+    )
+    return {
+        "filename": file.filename,
+        "size": size,
+        "hashes": hashes,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "throughput_mb_s": round(size / 1e6 / elapsed, 2) if elapsed > 0 else None,
+    }
+
+# TAR members up to this size are read whole and hashed concurrently; larger
+# ones are hashed inline while the stream is read (TAR streams are sequential).
+MANIFEST_INLINE_MEMBER_SIZE = 8 * 1024 * 1024
+MANIFEST_BATCH_BYTES = 64 * 1024 * 1024
+
+def _open_zip(fileobj):
+    fileobj.seek(0)
+    if not zipfile.is_zipfile(fileobj):
+        return None
+    fileobj.seek(0)
+    return zipfile.ZipFile(fileobj)
+
+def _hash_zip_member(zf, info, algorithm, chunk_size):
+    # ZipFile serialises raw reads on the shared file; decompression and
+    # hashing of different members run in parallel.
+    with zf.open(info) as member:
+        digest, size, _ = _hash_stream(member, [algorithm], chunk_size)
+    return digest[algorithm], size
+
+def _read_tar_batch(tar, members, algorithm, budget, chunk_size):
+    # members is a single iterator over the TAR stream, resumed batch by batch
+    batch, buffered = [], 0
+    for member in members:
+        if not member.isfile():
+            continue
+        data = tar.extractfile(member)
+        if member.size <= MANIFEST_INLINE_MEMBER_SIZE:
+            batch.append((member.name, member.size, data.read(), None))
+            buffered += member.size
+        else:
+            digest, size, _ = _hash_stream(data, [algorithm], chunk_size)
+            batch.append((member.name, size, None, digest[algorithm]))
+        if buffered >= budget:
+            break
+    return batch
+
+async def _hash_archive_members(fileobj, algorithm):
+    window = max(2, THREAD_POOL_WORKERS)
+    zf = await run_in_thread(_open_zip, fileobj)
+    entries = []
+    
+    if zf is not None:
+        with zf:
+            infos = [info for info in zf.infolist() if not info.is_dir()]
+            for start in range(0, len(infos), window):
+                chunk = infos[start:start + window]
+                results = await asyncio.gather(*(
+                    run_in_thread(_hash_zip_member, zf, info, algorithm, UPLOAD_CHUNK_SIZE,
+                                  timeout=FILE_TASK_TIMEOUT, wait=True)
+                    for info in chunk
+                ))
+                entries.extend((info.filename, size, digest) for info, (digest, size) in zip(chunk, results))
+        return "zip", entries
+    
+    fileobj.seek(0)
+    try:
+        tar = tarfile.open(fileobj=fileobj, mode="r|*")
+    except tarfile.TarError:
+        raise HTTPException(status_code=400, detail="Upload must be a ZIP or TAR archive")
+    with tar:
+        members = iter(tar)
+        while True:
+            batch = await run_in_thread(
+                _read_tar_batch, tar, members, algorithm, MANIFEST_BATCH_BYTES, UPLOAD_CHUNK_SIZE,
+                timeout=FILE_TASK_TIMEOUT, wait=True,
+            )
+            if not batch:
+                break
+            digests = await asyncio.gather(*(
+                run_in_thread(_hash_bytes, data, algorithm, wait=True) if data is not None
+                else asyncio.sleep(0, digest)
+                for _, _, data, digest in batch
+            ))
+            entries.extend((name, size, digest) for (name, size, _, _), digest in zip(batch, digests))
+    return "tar", entries
+
+@api_router.post("/tools/dev/hash/manifest")
+async def generate_checksum_manifest(
+    file: UploadFile = File(...),
+    algorithm: str = Form("sha256"),
+    format: str = Form("json"),  # json, checksum (sha256sum-style text)
+):
+    algorithm = parse_hash_algorithms(algorithm)[0]
+    if format not in ("json", "checksum"):
+        raise HTTPException(status_code=400, detail="Unsupported format. Use json or checksum")
+    
+    started = time.perf_counter()
+    try:
+        kind, entries = await _hash_archive_members(file.file, algorithm)
+    except HTTPException:
+        raise
+    except (zipfile.BadZipFile, tarfile.TarError, RuntimeError, NotImplementedError, EOFError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read archive: {e}")
+    elapsed = time.perf_counter() - started
+    
+    if format == "checksum":
+        manifest = "".join(f"{digest}  {name}\n" for name, _, digest in entries)
+        return Response(
+            content=manifest,
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="{algorithm.upper()}SUMS"'},
+        )
+    
+    by_digest = {}
+    for name, size, digest in entries:
+        by_digest.setdefault(digest, []).append((name, size))
+    duplicates = [
+        {"hash": digest, "size": paths[0][1], "paths": [name for name, _ in paths]}
+        for digest, paths in by_digest.items() if len(paths) > 1
+    ]
+    total_bytes = sum(size for _, size, _ in entries)
+    return {
+        "archive": file.filename,
+        "type": kind,
+        "algorithm": algorithm,
+        "members": [{"path": name, "size": size, "hash": digest} for name, size, digest in entries],
+        "total_members": len(entries),
+        "total_bytes": total_bytes,
+        "duplicates": duplicates,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "throughput_mb_s": round(total_bytes / 1e6 / elapsed, 2) if elapsed > 0 else None,
+    }
+
 @api_router.post("/tools/dev/timestamp")
 async def convert_timestamp(req: TimestampRequest):
     if req.timestamp:
@@ -784,9 +4755,32 @@ async def root():
         "docs": "/docs"
     }
 
+@app.on_event("startup")
+async def create_render_cache_index():
+    if not RENDER_CACHE_SHARED or db is None:
+        return
+    try:
+        await asyncio.wait_for(
+            db.render_cache.create_index("created_at", expireAfterSeconds=RENDER_CACHE_TTL), 5.0
+        )
+    except Exception as e:
+        logger.warning(f"Could not create render cache TTL index: {e}")
+
+@app.on_event("startup")
+async def start_killable_workers():
+    killable_pool.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     if client:
         client.close()
 
         client.close()
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    if process_pool:
+        process_pool.shutdown(wait=False, cancel_futures=True)
+    if thread_pool:
+        thread_pool.shutdown(wait=False, cancel_futures=True)
+    killable_pool.shutdown()
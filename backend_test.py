@@ -91,6 +91,15 @@ class ToolboxAPITester:
             {"text": "Hello world! This is a test sentence with multiple words."}
         )
         
+        # Find and Replace
+        self.run_test(
+            "Find and Replace",
+            "POST",
+            "tools/text/replace",
+            200,
+            {"text": "Acme sells acme widgets", "replacements": {"acme": "Globex"}, "ignore_case": True}
+        )
+        
         # Lorem Ipsum
         self.run_test(
             "Lorem Ipsum Generator",
@@ -255,6 +264,15 @@ class ToolboxAPITester:
             200,
             {"json_str": test_json}
         )
+        
+        # Diff Checker
+        self.run_test(
+            "Diff Checker - Unified",
+            "POST",
+            "tools/dev/diff",
+            200,
+            {"text1": "a\nb\nc", "text2": "a\nx\nc", "intraline": True}
+        )
 
 def main():
     print("🚀 Starting Toolbox API Tests...")
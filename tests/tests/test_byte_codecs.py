@@ -0,0 +1,81 @@
+import base64
+import binascii
+import io
+import os
+import random
+from urllib.parse import quote_from_bytes, unquote_to_bytes
+
+import pytest
+
+from server import (
+    BASE64_VARIANTS,
+    Base64Decoder,
+    Base64Encoder,
+    PercentDecoder,
+    PercentEncoder,
+    _codec_output_size,
+    _stream_codec,
+    base64_encoded_size,
+    iter_codec,
+)
+
+ONE_SHOT_ENCODE = {
+    "standard": base64.b64encode,
+    "urlsafe": base64.urlsafe_b64encode,
+    "mime": lambda data: base64.encodebytes(data).replace(b"\n", b"\r\n"),
+}
+
+
+def run(codec, data, chunk_size):
+    return b"".join(iter_codec(io.BytesIO(data), codec, chunk_size))
+
+
+@pytest.mark.parametrize("variant", BASE64_VARIANTS)
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 56, 57, 58, 1000, 4099])
+def test_base64_round_trip(variant, size):
+    data = os.urandom(size)
+    for chunk_size in (1, 5, 57, 64 * 1024):
+        encoded = run(Base64Encoder(variant), data, chunk_size)
+        assert encoded == ONE_SHOT_ENCODE[variant](data)
+        assert len(encoded) == base64_encoded_size(size, variant)
+        assert run(Base64Decoder(variant), encoded, chunk_size) == data
+
+
+def test_base64_decoder_accepts_missing_padding_and_line_breaks():
+    data = b"any carnal pleasure"
+    encoded = base64.urlsafe_b64encode(data).rstrip(b"=")
+    assert run(Base64Decoder("urlsafe"), encoded, 3) == data
+    wrapped = b"\r\n".join(base64.b64encode(data)[i:i + 4] for i in range(0, 28, 4))
+    assert run(Base64Decoder("standard"), wrapped, 2) == data
+
+
+@pytest.mark.parametrize("encoded", [b"QUJD*EVG", b"QUJDR", b"Q"])
+def test_base64_decoder_rejects_invalid_input(encoded):
+    with pytest.raises(binascii.Error):
+        run(Base64Decoder("standard"), encoded, 2)
+
+
+@pytest.mark.parametrize("safe", ["/", ""])
+def test_percent_round_trip(safe):
+    rng = random.Random(5)
+    data = bytes(rng.randrange(256) for _ in range(3000)) + "päth/ to?x=1&y=%".encode()
+    for chunk_size in (1, 2, 3, 7, 1024):
+        encoded = run(PercentEncoder(safe), data, chunk_size)
+        assert encoded == quote_from_bytes(data, safe).encode("ascii")
+        assert run(PercentDecoder(), encoded, chunk_size) == data
+
+
+def test_percent_decoder_holds_back_split_escapes():
+    encoded = b"a%20b%2Fc%E2%82%ACd%zz%4"
+    for chunk_size in range(1, 6):
+        assert run(PercentDecoder(), encoded, chunk_size) == unquote_to_bytes(encoded)
+
+
+def test_output_size_dry_run_and_stream():
+    data = os.urandom(10_000)
+    spool = io.BytesIO(data)
+    assert _codec_output_size(spool, Base64Encoder("mime"), 999) == base64_encoded_size(len(data), "mime")
+    # The dry run rewinds; the stream then closes the spool when done
+    out = b"".join(_stream_codec(spool, Base64Encoder("mime"), 999))
+    assert out == ONE_SHOT_ENCODE["mime"](data)
+    assert spool.closed
@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import CALC_MAX_FACTORIAL, CALC_MAX_INT_BITS, CompiledExpression, _evaluate_expression, _vector_factorial
+
+
+@pytest.mark.parametrize("expression,expected", [
+    ("1 + 2 * 3", 7),
+    ("2 ** 10", 1024),
+    ("-(3 - 5) % 4", 2),
+    ("sqrt(16) + abs(-2)", 6.0),
+    ("max(1, 5, 3) // 2", 2),
+    ("round(pi, 2)", 3.14),
+    ("factorial(5)", 120),
+    ("pow(2, 0.5) ** 2", pytest.approx(2.0)),
+])
+def test_evaluates_arithmetic(expression, expected):
+    assert _evaluate_expression(expression, {}) == expected
+
+
+def test_variables():
+    assert _evaluate_expression("x * y + z", {"x": 2, "y": 3, "z": 1}) == 7
+    with pytest.raises(ValueError, match="Missing value"):
+        _evaluate_expression("x + y", {"x": 1})
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')",
+    "().__class__",
+    "x.real",
+    "'a' * 3",
+    "[1, 2]",
+    "lambda: 1",
+    "1 if 1 else 2",
+    "1 < 2",
+    "open('x')",
+    "sqrt(*[4])",
+    "round(2.5, ndigits=1)",
+    "_pow(2, 3)",
+    "sqrt",
+    "1 << 1000000",
+    "(x := 1)",
+])
+def test_rejects_syntax_outside_the_whitelist(expression):
+    with pytest.raises(ValueError):
+        CompiledExpression(expression)
+
+
+def test_rejects_overlong_expressions():
+    with pytest.raises(ValueError, match="limited"):
+        CompiledExpression("1" * (server.CALC_MAX_LENGTH + 1))
+
+
+@pytest.mark.parametrize("expression", ["1" + "+1" * 499, "-" * 990 + "1", "(" * 400 + "1" + ")" * 400])
+def test_deep_nesting_is_invalid_not_a_crash(expression):
+    assert len(expression) <= server.CALC_MAX_LENGTH
+    with pytest.raises(ValueError, match="Invalid expression"):
+        CompiledExpression(expression)
+
+
+def test_power_cap():
+    assert _evaluate_expression("2 ** 13000", {}).bit_length() == 13001
+    with pytest.raises(ValueError, match="Exponent is too large"):
+        _evaluate_expression(f"2 ** {CALC_MAX_INT_BITS + 1}", {})
+    with pytest.raises(ValueError, match="Exponent is too large"):
+        _evaluate_expression("pow(10, 100000)", {})
+
+
+def test_factorial_cap_matches_bit_limit():
+    assert math.factorial(CALC_MAX_FACTORIAL).bit_length() <= CALC_MAX_INT_BITS
+    assert math.factorial(CALC_MAX_FACTORIAL + 1).bit_length() > CALC_MAX_INT_BITS
+    assert _evaluate_expression(f"factorial({CALC_MAX_FACTORIAL})", {}) == math.factorial(CALC_MAX_FACTORIAL)
+    with pytest.raises(ValueError, match="limited"):
+        _evaluate_expression(f"factorial({CALC_MAX_FACTORIAL + 1})", {})
+    with pytest.raises(ValueError, match="non-negative integer"):
+        _evaluate_expression("factorial(2.5)", {})
+
+
+@pytest.mark.parametrize("expression,message", [
+    ("(-8) ** (1/3)", "not a real number"),
+    ("pow(-8, 0.5)", "not a real number"),
+    ("1 / 0", "Division by zero"),
+    ("10.0 ** 400", "too large"),
+    ("exp(1000)", "too large"),
+    ("1e308 * 10", "not a finite number"),
+    ("sqrt(-1)", "domain"),
+])
+def test_error_results(expression, message):
+    with pytest.raises(ValueError, match=message):
+        _evaluate_expression(expression, {})
+
+
+def test_endpoint_answers_400_for_invalid_input():
+    client = TestClient(server.app)
+    for expression in ["-" * 990 + "1", "__import__('os')"]:
+        response = client.post("/api/tools/math/calculate", json={"expression": expression})
+        assert response.status_code == 400
+
+
+def test_vector_factorial():
+    values = np.array([0, 1, 5, 20, 170, 171, 200.5, -1, 2.5, np.nan, np.inf])
+    expected = [1, 1, 120, math.factorial(20), float(math.factorial(170)), np.inf, np.inf,
+                np.nan, np.nan, np.nan, np.inf]
+    np.testing.assert_array_equal(_vector_factorial(values), expected)
+
+
+def test_batch_csv():
+    client = TestClient(server.app)
+    response = client.post(
+        "/api/tools/math/calculate/batch",
+        files={"file": ("data.csv", b"x,y\n1,2\n3,\n4,5\n")},
+        data={"expression": "factorial(x) + y", "output_column": "z"},
+    )
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["x,y,z", "1,2,3.0", "3,,", "4,5,29.0"]
+    response = client.post(
+        "/api/tools/math/calculate/batch",
+        files={"file": ("data.csv", b"a,b\n1,2\n")},
+        data={"expression": "x + 1"},
+    )
+    assert response.status_code == 400
+    assert "Missing column" in response.json()["detail"]
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from server import _filtered_runs, diff_opcodes, group_opcodes, intern_lines
+
+
+def lcs_length(a, b):
+    # Plain O(nm) dynamic programming reference
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def apply_opcodes(a, b, opcodes):
+    out = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+    return out
+
+
+def check_opcodes(a, b, opcodes):
+    # Contiguous, covering both sides, and rebuilding b from a
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        assert tag in ("equal", "replace", "delete", "insert")
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    assert apply_opcodes(a, b, opcodes) == list(b)
+
+
+def matched(opcodes):
+    return sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal")
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_sequences_are_minimal(seed):
+    rng = random.Random(seed)
+    alphabet = rng.randint(1, 6)
+    a = [rng.randrange(alphabet) for _ in range(rng.randint(0, 40))]
+    b = [rng.randrange(alphabet) for _ in range(rng.randint(0, 40))]
+    opcodes = diff_opcodes(a, b)
+    check_opcodes(a, b, opcodes)
+    assert matched(opcodes) == lcs_length(a, b)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_edited_copies_are_minimal(seed):
+    # Mostly-equal inputs exercise the prefix/suffix trimming and small D
+    rng = random.Random(seed)
+    a = [rng.randrange(30) for _ in range(rng.randint(1, 80))]
+    b = list(a)
+    for _ in range(rng.randint(1, 5)):
+        pos = rng.randrange(len(b) + 1)
+        if rng.random() < 0.5 and pos < len(b):
+            del b[pos:pos + rng.randint(1, 3)]
+        else:
+            b[pos:pos] = [rng.randrange(40) for _ in range(rng.randint(1, 3))]
+    opcodes = diff_opcodes(a, b)
+    check_opcodes(a, b, opcodes)
+    assert matched(opcodes) == lcs_length(a, b)
+
+
+def test_identical_and_empty_inputs():
+    assert diff_opcodes([], []) == []
+    assert diff_opcodes([1, 2, 3], [1, 2, 3]) == [("equal", 0, 3, 0, 3)]
+    assert diff_opcodes([], [1, 2]) == [("insert", 0, 0, 0, 2)]
+    assert diff_opcodes([1, 2], []) == [("delete", 0, 2, 0, 0)]
+
+
+def test_adjacent_equal_runs_are_merged():
+    opcodes = diff_opcodes([1, 2, 3, 4, 5], [1, 2, 9, 4, 5])
+    assert opcodes == [("equal", 0, 2, 0, 2), ("replace", 2, 3, 2, 3), ("equal", 3, 5, 3, 5)]
+
+
+def test_one_sided_items_are_filtered_without_losing_matches():
+    # 100-199 and 200-299 only occur on one side each and can never match
+    a = [1, 2] + list(range(100, 200)) + [3, 4]
+    b = [1] + list(range(200, 300)) + [2, 3, 4]
+    runs = _filtered_runs(a, b, 0, len(a), 0, len(b))
+    for i, j, size in runs:
+        assert a[i:i + size] == b[j:j + size]
+        assert not any(100 <= x < 300 for x in a[i:i + size])
+    assert sum(size for _, _, size in runs) == lcs_length(a, b) == 4
+    opcodes = diff_opcodes(a, b)
+    check_opcodes(a, b, opcodes)
+    assert matched(opcodes) == 4
+
+
+def test_filtered_runs_respect_bounds():
+    a = [7, 1, 2, 3, 7]
+    b = [8, 1, 5, 3, 8]
+    runs = _filtered_runs(a, b, 1, 4, 1, 4)
+    assert runs == [(1, 1, 1), (3, 3, 1)]
+
+
+def test_group_opcodes_adds_context_and_splits_far_changes():
+    a = list(range(20))
+    b = list(a)
+    b[2] = -1
+    b[15] = -2
+    groups = group_opcodes(diff_opcodes(a, b), context=2)
+    assert len(groups) == 2
+    assert groups[0][0] == ("equal", 0, 2, 0, 2)
+    assert groups[0][-1] == ("equal", 3, 5, 3, 5)
+    assert groups[1][0] == ("equal", 13, 15, 13, 15)
+    assert group_opcodes(diff_opcodes(a, a)) == []
+
+
+def test_intern_lines_shares_ids_across_sides():
+    ids = {}
+    left = intern_lines(["a", "b", "a"], ids)
+    right = intern_lines(["b", "c"], ids)
+    assert left == [0, 1, 0]
+    assert right == [1, 2]
@@ -0,0 +1,99 @@
+import random
+import re
+
+import pytest
+
+from server import FindReplaceStream, PhraseAutomaton
+
+
+def replace_all(replacements, text, ignore_case=False, whole_words=False, chunks=None):
+    stream = FindReplaceStream(PhraseAutomaton(replacements, ignore_case, whole_words))
+    if chunks is None:
+        return stream.feed(text) + stream.finish(), stream
+    out = [stream.feed(text[i:i + chunks]) for i in range(0, len(text), chunks)]
+    return "".join(out) + stream.finish(), stream
+
+
+def regex_reference(replacements, text, ignore_case, whole_words):
+    # An alternation sorted longest first is leftmost-longest
+    pattern = "|".join(map(re.escape, sorted(replacements, key=len, reverse=True)))
+    if whole_words:
+        pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+    lookup = {}
+    for key, value in replacements.items():
+        lookup.setdefault(key.lower() if ignore_case else key, value)
+    return re.sub(
+        pattern,
+        lambda m: lookup[m.group(0).lower() if ignore_case else m.group(0)],
+        text,
+        flags=re.IGNORECASE if ignore_case else 0,
+    )
+
+
+def test_leftmost_longest():
+    result, _ = replace_all({"he": "1", "hers": "2", "she": "3", "his": "4"}, "ushers his")
+    # "she" starts before "he"/"hers", so it wins at offset 1
+    assert result == "u3rs 4"
+    result, _ = replace_all({"abc": "X", "abcd": "Y", "bcde": "Z"}, "abcde")
+    assert result == "Ye"
+
+
+def test_prefix_patterns_and_fallback():
+    result, _ = replace_all({"a": "1", "ab": "2", "abcd": "3"}, "abcabcdab")
+    assert result == "2c32"
+
+
+def test_counts_per_pattern():
+    result, stream = replace_all({"cat": "dog", "mouse": "rat"}, "cat mouse cat")
+    assert result == "dog rat dog"
+    assert stream.summary() == {"replacements": 3, "counts": {"cat": 2, "mouse": 1}}
+
+
+def test_ignore_case():
+    result, _ = replace_all({"Acme": "Globex"}, "ACME acme AcMe", ignore_case=True)
+    assert result == "Globex Globex Globex"
+    result, _ = replace_all({"Acme": "Globex"}, "ACME acme Acme")
+    assert result == "ACME acme Globex"
+
+
+def test_whole_words():
+    text = "cat concat cats cat_ (cat) cat"
+    result, _ = replace_all({"cat": "dog"}, text, whole_words=True)
+    assert result == "dog concat cats cat_ (dog) dog"
+
+
+def test_whole_words_falls_back_to_shorter_match():
+    # "foo bar" fails the boundary check; "foo" at the same offset does not
+    result, _ = replace_all({"foo": "X", "foo ba": "Y"}, "foo bar", whole_words=True)
+    assert result == "X bar"
+
+
+def test_match_across_chunk_boundaries():
+    text = "the quick brown fox " * 50
+    replacements = {"quick brown": "slow red", "fox": "hen", "the": "a"}
+    expected, _ = replace_all(replacements, text)
+    for size in (1, 2, 3, 7, 64):
+        result, _ = replace_all(replacements, text, chunks=size)
+        assert result == expected
+
+
+def test_whole_word_boundary_across_chunks():
+    for size in (1, 2, 3):
+        result, _ = replace_all({"ab": "X"}, "ab abc cab ab", whole_words=True, chunks=size)
+        assert result == "X abc cab X"
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_regex_reference(seed):
+    rng = random.Random(seed)
+    alphabet = rng.choice(["ab", "abc", "aB _", "abC d"])
+    replacements = {
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))): rng.choice(["X", "", "<>"])
+        for _ in range(rng.randint(1, 6))
+    }
+    text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+    ignore_case, whole_words = rng.random() < 0.5, rng.random() < 0.5
+    expected = regex_reference(replacements, text, ignore_case, whole_words)
+    assert replace_all(replacements, text, ignore_case, whole_words)[0] == expected
+    chunked, _ = replace_all(replacements, text, ignore_case, whole_words, chunks=rng.randint(1, 5))
+    assert chunked == expected
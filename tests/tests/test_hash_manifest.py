@@ -0,0 +1,98 @@
+import hashlib
+import io
+import tarfile
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+MEMBERS = {
+    "a.txt": b"alpha\n",
+    "dir/b.bin": bytes(range(256)) * 100,
+    "dir/copy.txt": b"alpha\n",
+    "empty": b"",
+}
+
+
+def make_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("dir/", b"")
+        for name, data in MEMBERS.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar(mode="w:gz"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tar:
+        directory = tarfile.TarInfo("dir")
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def manifest(archive, filename, **data):
+    client = TestClient(server.app)
+    return client.post("/api/tools/dev/hash/manifest", files={"file": (filename, archive)}, data=data)
+
+
+def expected_members(algorithm="sha256"):
+    return [
+        {"path": name, "size": len(data), "hash": hashlib.new(algorithm, data).hexdigest()}
+        for name, data in MEMBERS.items()
+    ]
+
+
+@pytest.mark.parametrize("filename,archive,kind", [
+    ("a.zip", make_zip(), "zip"),
+    ("a.tar.gz", make_tar(), "tar"),
+    ("a.tar", make_tar("w"), "tar"),
+])
+def test_json_manifest(filename, archive, kind):
+    response = manifest(archive, filename)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["type"] == kind
+    assert body["members"] == expected_members()
+    assert body["total_members"] == len(MEMBERS)
+    assert body["total_bytes"] == sum(map(len, MEMBERS.values()))
+    assert body["duplicates"] == [{
+        "hash": hashlib.sha256(b"alpha\n").hexdigest(), "size": 6, "paths": ["a.txt", "dir/copy.txt"],
+    }]
+
+
+def test_large_tar_members_are_hashed_inline(monkeypatch):
+    monkeypatch.setattr(server, "MANIFEST_INLINE_MEMBER_SIZE", 10)
+    monkeypatch.setattr(server, "MANIFEST_BATCH_BYTES", 1)
+    body = manifest(make_tar(), "a.tar.gz", algorithm="md5").json()
+    assert body["members"] == expected_members("md5")
+
+
+@pytest.mark.parametrize("archive", [make_zip(), make_tar()])
+def test_checksum_format(archive):
+    response = manifest(archive, "archive", format="checksum", algorithm="sha1")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="SHA1SUMS"'
+    assert response.text == "".join(
+        f"{hashlib.sha1(data).hexdigest()}  {name}\n" for name, data in MEMBERS.items()
+    )
+
+
+@pytest.mark.parametrize("data", [
+    {},
+    {"algorithm": "crc99"},
+    {"format": "xml"},
+])
+def test_rejects_bad_input(data):
+    archive = make_zip() if data else b"just some text, not an archive"
+    response = manifest(archive, "notes.txt", **data)
+    assert response.status_code == 400
+    if not data:
+        assert response.json()["detail"] == "Upload must be a ZIP or TAR archive"
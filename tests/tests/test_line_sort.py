@@ -0,0 +1,102 @@
+import io
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import ExternalLineSorter, HyperLogLog, estimate_distinct_lines, iter_upload_lines
+
+
+def reference(lines, mode, ignore_case, reverse):
+    key = (lambda line: line.decode("utf-8", "replace").casefold()) if ignore_case else (lambda line: line)
+    ordered = sorted(lines, key=key, reverse=reverse)
+    if mode == "sort":
+        return [(line, 1) for line in ordered]
+    first, counts = {}, {}
+    for line in lines:
+        first.setdefault(key(line), line)
+        counts[key(line)] = counts.get(key(line), 0) + 1
+    if mode == "unique":
+        return [first[k] for k in sorted(counts, reverse=reverse)]
+    return [(first[k], counts[k]) for k in sorted(counts, reverse=reverse)]
+
+
+def random_lines(rng, count):
+    words = [b"apple", b"Apple", b"APPLE", b"banana", b"b", b"", b"caf\xc3\xa9", b"Caf\xc3\xa9", b"z" * 30]
+    return [rng.choice(words) + rng.choice([b"", b"1", b"2"]) for _ in range(count)]
+
+
+def run_sorter(lines, batch=7, **kwargs):
+    sorter = ExternalLineSorter(**kwargs)
+    try:
+        for start in range(0, len(lines), batch):
+            sorter.add(lines[start:start + batch])
+        spilled = len(sorter._runs)
+        records = list(sorter)
+        # unique mode only reports lines; its counts are not carried through runs
+        return [line for line, _ in records] if sorter.mode == "unique" else records, spilled
+    finally:
+        sorter.close()
+
+
+@pytest.mark.parametrize("mode", ["sort", "unique", "count"])
+@pytest.mark.parametrize("ignore_case", [False, True])
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_in_memory_reference(mode, ignore_case, reverse, seed):
+    lines = random_lines(random.Random(seed), 400)
+    expected = reference(lines, mode, ignore_case, reverse)
+    in_memory, spilled = run_sorter(lines, mode=mode, ignore_case=ignore_case, reverse=reverse)
+    assert spilled == 0
+    assert in_memory == expected
+    external, spilled = run_sorter(
+        lines, mode=mode, ignore_case=ignore_case, reverse=reverse, memory_budget=300
+    )
+    assert spilled > 0
+    assert external == expected
+
+
+def test_multi_pass_merge(monkeypatch):
+    monkeypatch.setattr(server, "LINE_SORT_FAN_IN", 3)
+    lines = random_lines(random.Random(7), 300)
+    result, spilled = run_sorter(lines, batch=1, mode="count", memory_budget=1)
+    assert spilled > 3
+    assert result == reference(lines, "count", False, False)
+
+
+def test_iter_upload_lines():
+    data = b"\xef\xbb\xbfone\r\ntwo\n\n  three  \nfour"
+    split = [line for batch in iter_upload_lines(io.BytesIO(data), 3) for line in batch]
+    assert split == [b"one", b"two", b"", b"  three  ", b"four"]
+    trimmed = [line for batch in iter_upload_lines(io.BytesIO(data), 3, trim=True) for line in batch]
+    assert trimmed == [b"one", b"two", b"three", b"four"]
+
+
+@pytest.mark.parametrize("distinct", [0, 10, 1000, 50_000])
+def test_hyperloglog_accuracy(distinct):
+    sketch = HyperLogLog(12)
+    sketch.add([f"item-{i}".encode() for i in range(distinct)] * 2)
+    assert abs(sketch.estimate() - distinct) <= max(1, 4 * sketch.standard_error * distinct)
+
+
+def test_estimate_distinct_lines():
+    data = b"".join(b"Line %d\nline %d\n" % (i % 100, i % 100) for i in range(1000))
+    result = estimate_distinct_lines(io.BytesIO(data), 14, False, False, 64)
+    assert result["lines"] == 2000
+    assert abs(result["approx_distinct"] - 200) <= 4 * result["standard_error"] * 200
+    folded = estimate_distinct_lines(io.BytesIO(data), 14, True, False, 64)
+    assert abs(folded["approx_distinct"] - 100) <= 4 * folded["standard_error"] * 100
+
+
+def test_endpoints():
+    client = TestClient(server.app)
+    upload = {"file": ("emails.txt", b"b@x\r\nA@x\na@x\nb@x\n")}
+    response = client.post("/api/tools/text/sort-lines/file", files=upload, data={"mode": "count", "ignore_case": "true"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="emails-count.txt"'
+    assert response.text == "2\tA@x\n2\tb@x\n"
+    response = client.post("/api/tools/text/distinct-lines/file", files=upload, data={"precision": "18"})
+    assert response.json()["lines"] == 4 and response.json()["approx_distinct"] == 3
+    assert client.post("/api/tools/text/sort-lines/file", files=upload, data={"mode": "shuffle"}).status_code == 400
+    assert client.post("/api/tools/text/distinct-lines/file", files=upload, data={"precision": "30"}).status_code == 400
@@ -0,0 +1,72 @@
+import io
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import TextStatistics, _text_statistics_stream
+
+SAMPLE = "Hello world. This is a test!\n\nSecond paragraph, hello again?\nYes"
+
+
+def analyze(text, size=None, top_n=5):
+    stats = TextStatistics(top_n)
+    size = size or max(len(text), 1)
+    for i in range(0, len(text), size):
+        stats.feed(text[i:i + size])
+    return stats.finish()
+
+
+def random_text(rng, length):
+    pieces = ["word", "Hello", "hello,", "don't", "é", " ", "  ", "\n", "\n\n", "\t", ". ", "! ", "?", "\r\n", "’s"]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+def test_sample_counts():
+    result = analyze(SAMPLE, top_n=2)
+    assert result["words"] == 11
+    assert result["characters"] == len(SAMPLE)
+    assert result["characters_no_spaces"] == len(SAMPLE.replace(" ", ""))
+    assert result["characters_no_whitespace"] == len("".join(SAMPLE.split()))
+    assert result["lines"] == 4
+    assert result["sentences"] == 4
+    assert result["paragraphs"] == 2
+    assert result["top_words"][0] == {"word": "hello", "count": 2}
+
+
+def test_empty_text():
+    result = analyze("")
+    assert result["words"] == result["characters"] == result["sentences"] == result["paragraphs"] == 0
+    assert result["lines"] == 1
+    assert result["top_words"] == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chunking_does_not_change_result(seed):
+    rng = random.Random(seed)
+    text = random_text(rng, rng.randint(0, 300))
+    whole = analyze(text)
+    assert whole["words"] == len(text.split())
+    assert whole["characters"] == len(text)
+    assert whole["lines"] == text.count("\n") + 1
+    for size in (1, 2, 3, 7, 64):
+        assert analyze(text, size) == whole
+
+
+def test_stream_decodes_split_utf8():
+    text = "café naïve résumé. " * 50
+    data = text.encode()
+    result = _text_statistics_stream(io.BytesIO(data), 3, 7)
+    assert result == analyze(text, top_n=3)
+
+
+def test_endpoints_agree():
+    client = TestClient(server.app)
+    inline = client.post("/api/tools/text/wordcount", json={"text": SAMPLE, "top_n": 3}).json()
+    upload = client.post(
+        "/api/tools/text/wordcount/file",
+        files={"file": ("sample.txt", SAMPLE.encode())},
+        data={"top_n": "3"},
+    ).json()
+    assert inline == upload == analyze(SAMPLE, top_n=3)
@@ -0,0 +1,83 @@
+import io
+import random
+
+import pytest
+
+import server
+from server import make_case_transform, make_whitespace_transform, stream_transformed_upload
+
+# What each transform does to a whole text in one call
+REFERENCES = {
+    ("case", "upper"): str.upper,
+    ("case", "lower"): str.lower,
+    ("case", "title"): str.title,
+    ("case", "sentence"): lambda text: ". ".join(s.capitalize() for s in text.split(". ")),
+    ("case", "camel"): lambda text: (
+        lambda words: words[0].lower() + "".join(w.capitalize() for w in words[1:]) if words else ""
+    )(text.replace("-", " ").replace("_", " ").split()),
+    ("case", "snake"): lambda text: text.replace(" ", "_").replace("-", "_").lower(),
+    ("case", "kebab"): lambda text: text.replace(" ", "-").replace("_", "-").lower(),
+    ("whitespace", "collapse"): lambda text: " ".join(text.split()),
+    ("whitespace", "trim_lines"): lambda text: "\n".join(" ".join(line.split()) for line in text.split("\n")),
+    ("whitespace", "remove"): lambda text: "".join(text.split()),
+}
+
+
+def make(kind, name):
+    return make_case_transform(name) if kind == "case" else make_whitespace_transform(name)
+
+
+def run_chunked(transform, text, size):
+    out = [transform.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return "".join(out) + transform.finish()
+
+
+def random_text(rng, length):
+    pieces = ["word", "Ab", "x1y", "é", "ÉTÉ", " ", "  ", "\n", "\t", ". ", ".", "-", "_", "Hello", "\r\n"]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+@pytest.mark.parametrize("kind,name", sorted(REFERENCES))
+def test_whole_text_matches_reference(kind, name):
+    text = "  hello wORLD. this is-a_test.  Second\tline \n\n  third  line. ok "
+    transform = make(kind, name)
+    assert transform.feed(text) + transform.finish() == REFERENCES[kind, name](text)
+
+
+@pytest.mark.parametrize("kind,name", sorted(REFERENCES))
+@pytest.mark.parametrize("seed", range(40))
+def test_chunked_output_matches_reference(kind, name, seed):
+    rng = random.Random(seed)
+    text = random_text(rng, rng.randint(0, 60))
+    size = rng.randint(1, 8)
+    assert run_chunked(make(kind, name), text, size) == REFERENCES[kind, name](text)
+
+
+@pytest.mark.parametrize("kind,name", sorted(REFERENCES))
+def test_forced_cuts_inside_long_words(kind, name, monkeypatch):
+    # Text without boundaries is cut once the carry reaches the limit
+    monkeypatch.setattr(server, "TEXT_STATS_MAX_CARRY", 5)
+    rng = random.Random(7)
+    for _ in range(50):
+        text = "".join(rng.choice(["abcdefghij", "KLMNOP", "q1r", ". ", " ", "-", "\n"]) for _ in range(12))
+        assert run_chunked(make(kind, name), text, rng.randint(1, 4)) == REFERENCES[kind, name](text)
+
+
+def test_sentence_separator_split_across_chunks(monkeypatch):
+    monkeypatch.setattr(server, "TEXT_STATS_MAX_CARRY", 4)
+    text = "first one. second one. third"
+    for size in range(1, 6):
+        assert run_chunked(make_case_transform("sentence"), text, size) == "First one. Second one. Third"
+
+
+def test_unknown_modes():
+    assert make_case_transform("shouting") is None
+    assert make_whitespace_transform("squeeze") is None
+
+
+def test_stream_decodes_utf8_split_across_reads():
+    text = "ünïcödé wörds — and “quotes” " * 20
+    spool = io.BytesIO(text.encode("utf-8"))
+    out = b"".join(stream_transformed_upload(spool, make_case_transform("title"), 3))
+    assert out.decode("utf-8") == text.title()
+    assert spool.closed
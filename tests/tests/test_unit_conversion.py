@@ -0,0 +1,52 @@
+import math
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from server import round_significant
+
+
+@pytest.mark.parametrize("value,expected", [
+    (0.1 + 0.2, 0.3),
+    (1e-9 * 1.0000000000000002, 1e-9),
+    (1.602176634e-19, 1.602176634e-19),
+    (2.5e-12, 2.5e-12),
+    (123456789012345.0, 123456789012000.0),
+    (-0.30000000000000004, -0.3),
+    (5e-324, 5e-324),
+    (0.0, 0.0),
+])
+def test_scalar(value, expected):
+    result = round_significant(value)
+    assert isinstance(result, float)
+    assert result == expected
+
+
+def test_non_finite_pass_through():
+    result = round_significant(np.array([math.inf, -math.inf, math.nan, 0.0]))
+    assert result[0] == math.inf and result[1] == -math.inf
+    assert math.isnan(result[2]) and result[3] == 0.0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_array_matches_formatting(seed):
+    rng = random.Random(seed)
+    values = [rng.uniform(1, 10) * 10.0 ** rng.randint(-40, 40) * rng.choice((1, -1)) for _ in range(2000)]
+    result = round_significant(np.array(values))
+    for value, rounded in zip(values, result.tolist()):
+        # Ties may round either way in the last digit, but never leave float noise
+        assert rounded == pytest.approx(float(f"{value:.12g}"), rel=2e-12)
+        assert len(repr(abs(rounded)).split("e")[0].replace(".", "").strip("0")) <= 13
+
+
+def test_endpoints():
+    client = TestClient(server.app)
+    response = client.post("/api/tools/convert/units", json={
+        "category": "length", "value": 1, "from_unit": "nanometer", "to_unit": "meter"})
+    assert response.json() == {"result": 1e-9}
+    response = client.post("/api/tools/convert/units/bulk", json={
+        "category": "length", "values": [1, 2.5], "from_unit": "nanometer", "to_unit": "kilometer"})
+    assert response.json() == {"results": [1e-12, 2.5e-12]}